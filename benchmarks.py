@@ -0,0 +1,132 @@
+"""Benchmarks for hypickle. Run with `python benchmarks.py` to time decoding player responses, or with
+   `python benchmarks.py results` to time reading a synthetic results folder of 10k files."""
+
+from __future__ import annotations
+import json
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from copy import deepcopy
+from functools import partial
+from typing import Any, Callable
+
+from hypickle import JsonDecoding, MyClasses, ProcessingResults, ResultsIndex
+from hypickle.hypixel import PlayerRecord
+
+def make_player_response(num_games: int, stats_per_game: int, seed: int = 0) -> bytes:
+    """Returns the body of a synthetic player response, shaped like the real ones (most of the size is
+       in the `stats` and `achievements` trees, which have a key for every game the player has touched)."""
+    rand = random.Random(seed)
+    stats: dict = {
+        f'Game{g}': {f'stat_{g}_{i}': (rand.randint(0, 10**6) if i % 4 else f'value_{rand.random()}')
+                     for i in range(stats_per_game)}
+        for g in range(num_games)
+    }
+    stats['Bedwars'] = {'final_kills_bedwars': 1500, 'final_deaths_bedwars': 300, 'Experience': 487000,
+                        **{f'bw_stat_{i}': rand.randint(0, 10**6) for i in range(stats_per_game)}}
+    stats['Pit'] = {'profile': {'xp': 10**7, 'inventory': {'data': [rand.randint(0, 255) for _ in range(2000)]}},
+                    'pit_stats_ptl': {'playtime_minutes': 9000, 'kills': 40000, 'deaths': 20000}}
+    player: dict = {
+        'uuid': 'b1d3e4f5a6b7c8d9e0f1a2b3c4d5e6f7', 'displayname': 'SomePlayer', 'rank': 'NORMAL',
+        'newPackageRank': 'MVP_PLUS', 'monthlyPackageRank': 'SUPERSTAR', 'rankPlusColor': 'GOLD',
+        'monthlyRankColor': 'GOLD', 'lastLogin': 1700000000000, 'lastLogout': 1700000500000,
+        'networkExp': 12345678.5, 'stats': stats,
+        'achievements': {f'achievement_{i}': rand.randint(0, 5000) for i in range(num_games * 20)},
+    }
+    player['achievements']['bedwars_level'] = 130
+    return json.dumps({'success': True, 'player': player}).encode()
+
+def peak_allocation(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+def make_results_folder(num_files: int, friends_per_file: int, seed: int = 0) -> None:
+    """Writes a synthetic results folder in the current directory. Each file is a player with a friends list,
+       where some friends have their own (shorter) friends lists, like the files from `friendsoffriends`."""
+    rand = random.Random(seed)
+    num_players = num_files * 20
+    def make_player(depth: int) -> dict:
+        d: dict = {'uuid': f"{(i := rand.randrange(num_players)):032x}", 'name': f"player{i}"}
+        if rand.random() < 0.5:
+            d.update(fkdr=round(rand.random() * 5, 3), star=rand.randint(0, 1000))
+        if depth > 0 and rand.random() < 0.8:
+            d['time'] = 1_500_000_000_000 + rand.randrange(10**11)
+        if depth < 2 and (depth == 0 or rand.random() < 0.1):
+            d['friends'] = [make_player(depth + 1) for _ in range(friends_per_file if depth == 0 else 10)]
+        return d
+    os.makedirs(ResultsIndex.RESULTS_FOLDER)
+    for n in range(num_files):
+        with open(os.path.join(ResultsIndex.RESULTS_FOLDER, f"Friends of player{n} - {n}.txt"), 'w') as f:
+            f.write(json.dumps(make_player(0)))
+
+def time_and_peak(label: str, func: Callable[[], Any], number: int = 1) -> None:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    secs = (time.perf_counter() - start) / number
+    print(f"    {label:<52}{secs * 1000:11.4f} ms, {peak_allocation(func) // 1024:8} KB peak python allocation")
+
+def results_folder_benchmark(num_files: int = 10_000, friends_per_file: int = 40) -> None:
+    """Times the first read of a synthetic results folder (which builds the index), and then the reads
+       callers make afterwards, comparing the shared read-only views with the deepcopies callers used to get."""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        print(f"Writing {num_files} results files...")
+        make_results_folder(num_files, friends_per_file)
+        MyClasses.set_args(['main.py', 'player0'])
+        uuids = [f"{i:032x}" for i in random.Random(1).sample(range(num_files * 20), 1000)]
+
+        start = time.perf_counter()
+        ProcessingResults.ign_uuid_pairs_in_results()
+        print(f"First read (indexing the folder and building the ign/uuid maps): "
+              f"{time.perf_counter() - start:.2f} s, index is "
+              f"{os.path.getsize(ResultsIndex.INDEX_FILENAME) // 1024} KB\n")
+        pairs = ProcessingResults.ign_uuid_pairs_in_results()
+        print(f"Reads afterwards ({len(pairs)} ign/uuid pairs):")
+        time_and_peak('ign_uuid_pairs_in_results() (read-only view)', ProcessingResults.ign_uuid_pairs_in_results,
+                      1000)
+        time_and_peak('deepcopy of the ign/uuid pairs', lambda: deepcopy(dict(pairs)), 10)
+        time_and_peak('best friends list of 1000 players', lambda: [
+            ProcessingResults.get_best_f_list_for_player_in_results(uuid) for uuid in uuids])
+        os.chdir(original_cwd)
+
+def decoding_benchmark() -> None:
+    """Compares decoding just the fields `hypixel.PlayerRecord` needs from a player response against
+       decoding the whole response with `json.loads`."""
+    paths = tuple(('player',) + p for p in PlayerRecord.PROJECTION)
+    backend = next((m for m in ('simdjson', 'orjson') if importlib.util.find_spec(m)), 'json')
+    print(f"decode_paths backend: {backend}\n")
+    for label, num_games, stats_per_game in (('small', 5, 50), ('medium', 40, 200), ('large', 80, 500)):
+        body = make_player_response(num_games, stats_per_game)
+        assert (JsonDecoding.decode_paths(body, paths) ==
+                JsonDecoding.project(json.loads(body), paths))
+        cases: dict[str, Callable[[], Any]] = {
+            'json.loads': partial(json.loads, body),
+            'decode_paths': partial(JsonDecoding.decode_paths, body, paths),
+        }
+        print(f"{label} response ({len(body) // 1024} KB):")
+        for name, func in cases.items():
+            number = max(1, 2_000_000 // len(body))
+            secs = min(timeit.repeat(func, number=number, repeat=5)) / number
+            print(f"    {name:<14}{secs * 1000:8.3f} ms per response, "
+                  f"{peak_allocation(func) // 1024:6} KB peak python allocation")
+        print()
+
+def main() -> None:
+    if sys.argv[1:] == ['results']:
+        results_folder_benchmark()
+    else:
+        decoding_benchmark()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""Contains the archive format that results files can be written in, as a compact alternative to json. An archive
+   stores each dict of a report as a row, with one column per key (see `to_bytes`)."""
+
+from __future__ import annotations
+import os
+import sys
+import math
+import mmap
+import struct
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Iterable
+
+from . import Files
+from . import Utils
+from . import UuidTable
+from .MyClasses import UUID_Plus_Time
+
+EXTENSION = Files.ARCHIVE_EXTENSION
+_MAGIC = b'HFA\0'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHxxII')
+_COLUMNS = (('time', 'd'), ('fkdr', 'd'), ('uuid', 'B'), ('pos', 'I'), ('first_friend', 'I'),
+            ('num_friends', 'I'), ('star', 'i'), ('flags', 'H'), ('depth', 'H'))
+"""Each column's name and array typecode. The uuid column has 16 bytes per row, and the time column has the time
+   each player was friended by the player whose friends list they're in (in epoch milliseconds, or nan)."""
+
+# The bits in the flags column, for which keys a row's dict has (and what type its time has):
+NAME, FKDR, STAR, PIT_RANK, FRIENDS, TIME = 1, 2, 4, 8, 16, 32
+TIME_IS_NONE, TIME_IS_DATE, TIME_IS_INT, TIME_IN_SECONDS = 64, 128, 256, 512
+_KEY_FLAGS = (('name', NAME), ('fkdr', FKDR), ('star', STAR), ('pit_rank', PIT_RANK), ('time', TIME),
+              ('friends', FRIENDS))
+NON_TRIVIAL_FLAGS = NAME | FKDR | STAR | PIT_RANK | FRIENDS
+
+def num_keys(flags: int) -> int:
+    """Returns how many keys a row's dict has (including 'uuid'), given its flags."""
+    return 1 + bin(flags & (NON_TRIVIAL_FLAGS | TIME)).count('1')
+
+@dataclass
+class Columns:
+    """The columns of an archive. The numeric ones are copied out of the file (in the same order as `_COLUMNS`,
+       with the uuid column being the 16 byte uuids of the rows concatenated), and `strings` has the name,
+       pit rank, and date string (or None) of each row."""
+    time: array
+    fkdr: array
+    uuid: bytes
+    pos: array
+    first_friend: array
+    num_friends: array
+    star: array
+    flags: array
+    depth: array
+    strings: list[tuple[Optional[str], Optional[str], Optional[str]]]
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def friend_rows(self, row: int) -> range:
+        return range(self.first_friend[row], self.first_friend[row] + self.num_friends[row])
+
+def is_archive(filepath: str) -> bool:
+    return filepath.endswith(EXTENSION)
+
+def time_in_ms(time_val: str | float | int | None) -> float:
+    """Returns the time friended in epoch milliseconds, or nan if there isn't one."""
+    if time_val is None or (ms := UUID_Plus_Time('', time_val).time_epoch_in_milliseconds()) is None:
+        return math.nan
+    return ms
+
+def _layout(num_rows: int) -> tuple[list[int], int]:
+    """Returns the offset of each column in `_COLUMNS`, and the offset of the compressed strings."""
+    offsets, offset = [], _HEADER.size
+    for name, typecode in _COLUMNS:
+        itemsize = array(typecode).itemsize
+        offset = -(-offset // itemsize) * itemsize
+        offsets.append(offset)
+        offset += num_rows * itemsize * (16 if name == 'uuid' else 1)
+    return (offsets, offset)
+
+def _check(condition: bool, msg: str) -> None:
+    if not condition:
+        raise ValueError(msg)
+
+def to_bytes(report: dict) -> bytes:
+    """Returns the archive for a report (a dict in the format of the json results files). Raises a ValueError
+       if the report has anything the archive format can't store exactly.
+       The rows are in breadth-first order, so the friends of any dict are a contiguous range of rows, and
+       reading a friends list is just slicing the uuid and time columns. The archive is a 16 byte header (magic,
+       version, number of rows, length of the compressed strings), then each column in `_COLUMNS` uncompressed
+       (starting at a multiple of its item size), then the names, pit ranks, and date strings compressed together."""
+    assert sys.byteorder == 'little', "Archives store their columns in little endian order"
+    preorder_positions: dict[int, int] = {}
+    def number_preorder(d: dict) -> None:
+        preorder_positions[id(d)] = len(preorder_positions)
+        for friend_dict in d.get('friends', []) if isinstance(d, dict) else []:
+            number_preorder(friend_dict)
+    number_preorder(report)
+    columns: dict[str, array] = {name: array(typecode) for name, typecode in _COLUMNS}
+    strings: list[str] = []
+    rows = [(report, 0)]
+    for d, depth in rows: # `rows` grows as each dict's friends are appended, giving the breadth-first order.
+        _check(isinstance(d, dict) and {'uuid'} <= d.keys() <= {'uuid', *(k for k, _ in _KEY_FLAGS)},
+               f"Unexpected keys in {d}")
+        _check(isinstance(d['uuid'], str) and len(d['uuid']) == 32 and
+               UuidTable.to_bytes(d['uuid']).hex() == d['uuid'], f"Invalid uuid in {d}")
+        flags = sum(flag for k, flag in _KEY_FLAGS if k in d)
+        for k in ('name', 'pit_rank'):
+            if k in d:
+                _check(isinstance(d[k], str) and '\0' not in d[k], f"Invalid {k} in {d}")
+                strings.append(d[k])
+        _check(type(d.get('fkdr', 0.0)) is float, f"Invalid fkdr in {d}")
+        _check(type(d.get('star', 0)) is int and -2**31 <= d.get('star', 0) < 2**31, f"Invalid star in {d}")
+        if 'time' in d:
+            flags |= _time_flags(d['time'])
+            if flags & TIME_IS_DATE:
+                strings.append(d['time'])
+        friends = d.get('friends', [])
+        _check(isinstance(friends, list) and depth < 2**16 - 1, f"Invalid friends in {d}")
+        columns['time'].append(time_in_ms(d.get('time')))
+        columns['fkdr'].append(d.get('fkdr', math.nan))
+        columns['uuid'].frombytes(UuidTable.to_bytes(d['uuid']))
+        columns['pos'].append(preorder_positions[id(d)])
+        columns['first_friend'].append(len(rows))
+        columns['num_friends'].append(len(friends))
+        columns['star'].append(d.get('star', -1))
+        columns['flags'].append(flags)
+        columns['depth'].append(depth)
+        rows.extend((friend_dict, depth + 1) for friend_dict in friends)
+    compressed_strings = zlib.compress('\0'.join(strings).encode())
+    offsets, strings_offset = _layout(len(rows))
+    data = bytearray(strings_offset + len(compressed_strings))
+    data[:_HEADER.size] = _HEADER.pack(_MAGIC, _VERSION, len(rows), len(compressed_strings))
+    for offset, (name, _) in zip(offsets, _COLUMNS):
+        column_bytes = columns[name].tobytes()
+        data[offset:offset + len(column_bytes)] = column_bytes
+    data[strings_offset:] = compressed_strings
+    return bytes(data)
+
+def _time_flags(time_val: str | float | int | None) -> int:
+    """Returns the flags for a time friended, checking that it can be stored exactly."""
+    if time_val is None:
+        return TIME_IS_NONE
+    if isinstance(time_val, str):
+        _check(Utils.is_date_string(time_val), f"Invalid time '{time_val}'")
+        return TIME_IS_DATE
+    _check(type(time_val) in (int, float), f"Invalid time '{time_val}'")
+    flags = TIME_IS_INT if type(time_val) is int else 0
+    if time_in_ms(time_val) != time_val:
+        flags |= TIME_IN_SECONDS
+    _check(_time_from_ms(time_in_ms(time_val), flags) == time_val, f"Can't store the time '{time_val}' exactly")
+    return flags
+
+def _time_from_ms(ms: float, flags: int) -> float | int:
+    """Returns the time friended in the form it had in the report (when it isn't a date string or None)."""
+    time_val = ms / 1000 if flags & TIME_IN_SECONDS else ms
+    return int(time_val) if flags & TIME_IS_INT else time_val
+
+def read_columns(filepath: str) -> Columns:
+    assert sys.byteorder == 'little', "Archives store their columns in little endian order"
+    with open(filepath, 'rb') as f:
+        assert os.fstat(f.fileno()).st_size >= _HEADER.size, f"{filepath} is too short to be an archive"
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            magic, version, num_rows, strings_len = _HEADER.unpack(m[:_HEADER.size])
+            assert magic == _MAGIC and version == _VERSION, f"{filepath} isn't an archive this version can read"
+            offsets, strings_offset = _layout(num_rows)
+            assert len(m) == strings_offset + strings_len, f"{filepath} is truncated"
+            numeric_columns: dict[str, array] = {}
+            for offset, (name, typecode) in zip(offsets, _COLUMNS):
+                column = numeric_columns[name] = array(typecode)
+                column.frombytes(m[offset:offset + num_rows * column.itemsize * (16 if name == 'uuid' else 1)])
+            compressed_strings = m[strings_offset:]
+    uuid_column = numeric_columns.pop('uuid').tobytes()
+    strings = iter(zlib.decompress(compressed_strings).decode().split('\0'))
+    return Columns(**numeric_columns, uuid=uuid_column, strings=[
+        (next(strings) if flags & NAME else None, next(strings) if flags & PIT_RANK else None,
+         next(strings) if flags & TIME_IS_DATE else None)
+        for flags in numeric_columns['flags'].tolist()
+    ])
+
+def read_dict(filepath: str) -> dict:
+    """Returns the report stored in the archive, in the same form as it'd be read from a json results file."""
+    columns = read_columns(filepath)
+    flags_column, times = columns.flags.tolist(), columns.time.tolist()
+    dicts = []
+    for row, flags in enumerate(flags_column):
+        name, pit_rank, date_string = columns.strings[row]
+        d: dict = {'uuid': columns.uuid[row*16:(row+1)*16].hex()}
+        if flags & NAME:
+            d['name'] = name
+        if flags & FKDR:
+            d['fkdr'] = columns.fkdr[row]
+        if flags & STAR:
+            d['star'] = columns.star[row]
+        if flags & PIT_RANK:
+            d['pit_rank'] = pit_rank
+        if flags & TIME:
+            d['time'] = (None if flags & TIME_IS_NONE else date_string if flags & TIME_IS_DATE
+                         else _time_from_ms(times[row], flags))
+        dicts.append(d)
+    for row, d in enumerate(dicts):
+        if flags_column[row] & FRIENDS:
+            d['friends'] = [dicts[i] for i in columns.friend_rows(row)]
+    return dicts[0]
+
+def read_results_file(filepath: str) -> dict:
+    """Returns the report in a results file, which can be either an archive or json."""
+    return read_dict(filepath) if is_archive(filepath) else Files.read_json_textfile(filepath)
+
+def write(report: dict, description: str, folder_name: str = "results") -> None:
+    """Like `Files.write_data_as_json_to_file`, but writes the report as an archive. If the report has anything
+       an archive can't store, it's written as json instead."""
+    try:
+        data = to_bytes(report)
+    except ValueError as e:
+        print(f"Writing the report as json, since it can't be stored in an archive: {e}")
+        Files.write_data_as_json_to_file(report, description, folder_name)
+        return
+    if Files.confirm_file_output(description):
+        with open(Files.create_file(description, folder_name, EXTENSION), "wb") as f:
+            f.write(data)
+
+def convert_files(filepaths: Iterable[str]) -> None:
+    """Converts these json results files to archives. Each archive is checked to have the same report as the
+       json file (and is given the json file's mtime) before the json file is deleted. Files that can't be
+       stored exactly are left as json."""
+    num_converted, old_size, new_size = 0, 0, 0
+    for filepath in filepaths:
+        report = Files.read_json_textfile(filepath)
+        try:
+            data = to_bytes(report)
+        except ValueError as e:
+            print(f"Leaving {filepath} as json: {e}")
+            continue
+        archive_path = Files.without_extension(filepath) + EXTENSION
+        with open(temp_path := archive_path + '.tmp', 'wb') as f:
+            f.write(data)
+        if read_dict(temp_path) != report:
+            print(f"Leaving {filepath} as json, since its archive didn't have the same report")
+            os.remove(temp_path)
+            continue
+        stat = os.stat(filepath)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, archive_path)
+        os.remove(filepath)
+        num_converted, old_size, new_size = num_converted + 1, old_size + stat.st_size, new_size + len(data)
+    print(f"Converted {num_converted} files to archives, going from {old_size} to {new_size} bytes.")
@@ -8,21 +8,25 @@ from . import Files
 class Args:
     def __init__(self, args: list[str]) -> None:
         assert re.split(r'/|\\', args[0])[-1] in ('main.py', 'hypickle')
-        args = [arg if arg.endswith('.txt') else arg.lower() for arg in args[1:]]
+        args = [arg if Files.is_friends_file(arg) else arg.lower() for arg in args[1:]]
         self._ARGS = Files.apply_aliases(args)
         self._ARG_KEYWORDS = ('all', 'friendsoffriends', 'justuuids', 'checkresults',
                               'diff', 'starsort', 'pitsort',
                               'fileoutput', 'updateuuids', 'matchingignsuuids',
+                              'archiveoutput', 'convertresults', 'storesnapshots', 'exportsnapshots',
+                              'compressoutput', 'compressresults',
                               'includemultiplayerfiles', 'keepfirstdictmultifiles',
                               'addadditionalfriends', 'addadditionals', 'addfriends',
                               'noadditionalfriends', 'noadditionals',
                               'addaliases', 'updatealiases', 'adduuidaliases', 'updateuuidaliases',
-                              'showaliases', 'printaliases',
+                              'showaliases', 'printaliases', 'restorealiases', 'restoreuuids',
                               'getplayerjson', 'playerjson', 'noverify', 'dontverify', 'nover',
                               'pitpercent', 'pit%', 'pitplot', 'nwplot', 'bwplot', 'contains',
                               'trackargs', 'argsonline', 'newest', 'oldest',
                               'debugapi', 'showjsondiff', 'showjsonupdates',
                               'norecentgame', 'norecentgames', 'list', 'copyable',
+                              'nocache', 'refreshcache',
+                              'graphdegree', 'graphfriends', 'graphdistance', 'graphhops',
                               'help', 'features')
         # These keywords are possible options the user can specify for using the program. All of these are
         # 'non-positional'; i.e., it doesn't matter where they appear in the user's command line argument list.
@@ -67,6 +71,26 @@ class Args:
     def do_file_output(self) -> bool:
         return 'fileoutput' in self._ARGS
 
+    def do_archive_output(self) -> bool:
+        """Returns whether file output should be written as an archive (see Archive.py) rather than json."""
+        return 'archiveoutput' in self._ARGS
+
+    def convert_results(self) -> bool:
+        return 'convertresults' in self._ARGS
+
+    def store_snapshots(self) -> bool:
+        return 'storesnapshots' in self._ARGS
+
+    def export_snapshots(self) -> bool:
+        return 'exportsnapshots' in self._ARGS
+
+    def compress_output(self) -> bool:
+        """Returns whether json written to files (reports and player jsons) should be gzip compressed."""
+        return 'compressoutput' in self._ARGS
+
+    def compress_results(self) -> bool:
+        return 'compressresults' in self._ARGS
+
     def update_uuids(self) -> bool:
         return 'updateuuids' in self._ARGS
 
@@ -93,6 +117,12 @@ class Args:
     def add_uuid_aliases(self) -> bool:
         return 'adduuidaliases' in self._ARGS or 'updateuuidaliases' in self._ARGS
 
+    def restore_aliases(self) -> bool:
+        return 'restorealiases' in self._ARGS
+
+    def restore_uuids(self) -> bool:
+        return 'restoreuuids' in self._ARGS
+
     def print_aliases(self) -> bool:
         return 'printaliases' in self._ARGS or 'showaliases' in self._ARGS
 
@@ -134,6 +164,14 @@ class Args:
            status isn't shown."""
         return 'showjsondiff' in self._ARGS or 'showjsonupdates' in self._ARGS
 
+    def use_response_cache(self) -> bool:
+        """Returns whether api responses should be read from/written to the on-disk cache."""
+        return 'nocache' not in self._ARGS
+
+    def refresh_response_cache(self) -> bool:
+        """Returns whether to skip reading from the on-disk cache, while still writing fresh responses to it."""
+        return 'refreshcache' in self._ARGS
+
     def output_recent_game(self) -> bool:
         return all(x not in self._ARGS for x in ('norecentgame', 'norecentgames')) and not self.just_uuids()
 
@@ -142,6 +180,19 @@ class Args:
            by the igns after that."""
         return 'list' in self._ARGS or 'copyable' in self._ARGS
 
+    def graph_degree(self) -> bool:
+        return 'graphdegree' in self._ARGS
+
+    def graph_friends(self) -> bool:
+        return 'graphfriends' in self._ARGS
+
+    def graph_distance(self) -> bool:
+        return 'graphdistance' in self._ARGS
+
+    def graph_hops(self) -> bool:
+        """Returns whether to print the players within some number of hops (the last arg) of each player."""
+        return 'graphhops' in self._ARGS
+
     def list_features(self) -> bool:
         return 'help' in self._ARGS or 'features' in self._ARGS
 
@@ -149,26 +200,39 @@ class Args:
         mini_programs = (self.update_aliases(), self.add_uuid_aliases(), self.print_aliases(),
                          self.contains_substr(), self.add_additional_friends(), self.get_player_json(),
                          self.pit_percent(), self.pit_plot(), self.network_plot(), self.bedwars_plot(),
-                         self.comma_sep_list(), self.list_features())
+                         self.comma_sep_list(), self.convert_results(), self.store_snapshots(),
+                         self.export_snapshots(), self.compress_results(), self.restore_aliases(), self.restore_uuids(),
+                         self.graph_degree(), self.graph_friends(), self.graph_distance(), self.graph_hops(),
+                         self.list_features())
         assert (bool_sum := sum(1 for x in mini_programs if x)) <= 1
         return bool_sum == 1
 
     def _validation_checks(self) -> None:
-        assert all(arg.endswith('.txt') or arg.lower() == arg
+        assert all(Files.is_friends_file(arg) or arg.lower() == arg
                    for arg in self.get_args(False))
         assert set(self.get_keywords()).isdisjoint(Files.get_aliases().keys())
         if self.do_file_output():
             assert self.date_cutoff() is None and not self.just_online_friends()
             assert not self.get_newest_friends() and not self.get_oldest_friends()
+        assert not self.do_archive_output() or self.do_file_output()
+        assert not (self.do_archive_output() and self.compress_output())
         assert not (self.sort_by_pit_rank() and self.sort_by_star())
         if any((self.update_aliases(), self.print_aliases(), self.pit_plot(), self.network_plot(),
-                self.bedwars_plot(), self.list_features())):
+                self.bedwars_plot(), self.convert_results(), self.store_snapshots(), self.export_snapshots(),
+                self.compress_results(), self.list_features())):
             assert not self.get_args(True) and len(self.get_args(False)) == 1
+        if self.restore_aliases() or self.restore_uuids():
+            assert not self.get_args(True) and len(self.get_args(False)) == 2 and self.date_cutoff()
         if self.add_additional_friends():
             assert len(self.get_args(True)) == 1 and len(self.get_args(False)) == 2
         if any((self.get_player_json(), self.pit_percent(), self.add_uuid_aliases(),
-                self.comma_sep_list(), self.contains_substr())):
+                self.comma_sep_list(), self.contains_substr(), self.graph_degree(), self.graph_friends())):
             assert len(self.get_args(True)) >= 1 and len(self.get_args(False)) >= 2
+        if self.graph_distance():
+            assert len(self.get_args(True)) == 2 and len(self.get_args(False)) == 3
+        if self.graph_hops():
+            assert len(self.get_args(True)) >= 2 and len(self.get_args(False)) == len(self.get_args(True)) + 1
+            assert self.get_args(True)[-1].isdigit()
         assert not (self.get_newest_friends() and self.get_oldest_friends())
         if self.track_if_arg_players_online():
             assert self.just_online_friends()
\ No newline at end of file
@@ -4,11 +4,11 @@ and stuff in this same file."""
 from __future__ import annotations
 import os
 import os.path
-from pathlib import Path
 import json
 import time
-from typing import Optional, Iterable
-from copy import deepcopy
+import gzip
+from typing import Optional, Iterable, Iterator, Mapping, IO
+from types import MappingProxyType
 import shutil
 import ntpath
 from string import whitespace
@@ -17,96 +17,194 @@ from . import Utils
 
 ALIASES_FILENAME = "aliases.txt"
 UUIDS_FILENAME = "uuids.txt"
-HYPICKLE_CACHE_FOLDER = "hypickle_cache"
+ARCHIVE_EXTENSION = ".hfa"
+"""The extension of results files written in the archive format (see Archive.py), rather than as json."""
+COMPRESSED_EXTENSION = ".txt.gz"
+"""The extension of json files that are gzip compressed. These are read and written as a stream, the same as
+   '.txt' files."""
+PLAYER_JSONS_FOLDER = "results/player-jsons"
+JOURNAL_SUFFIX = ".journal"
+HISTORY_SUFFIX = ".history"
+COMPACT_AFTER_ENTRIES = 500
+"""uuids.txt and aliases.txt are each a snapshot, plus a journal of the changes made since then (e.g. in
+   `uuids.txt.journal`). Once the journal has this many entries, a new snapshot is written and the journal's
+   entries are moved to the end of the history file, which keeps every change for restoring an older state."""
 
-_ign_uuid_pairs_uuids_txt: Optional[dict[str, str]] = None
-_ign_uuid_pairs_hypickle_cache: Optional[dict[str, str]] = None
+_ign_uuid_pairs_uuids_txt: Optional[Mapping[str, str]] = None
+_compiled_aliases: Optional[tuple[tuple, dict[str, list[str]]]] = None
+"""The stat of aliases.txt and its journal when the aliases were compiled, and the compiled aliases."""
 
-def write_data_as_json_to_file(data: dict, description: str, folder_name: str = "results") -> None:
+def write_data_as_json_to_file(data: dict, description: str, folder_name: str = "results",
+                               compress: bool = False) -> None:
+    if confirm_file_output(description):
+        filepath = create_file(description, folder_name, COMPRESSED_EXTENSION if compress else ".txt")
+        with open_text(filepath, write=True) as f:
+            json.dump(data, f, indent=4)
+
+def confirm_file_output(description: str) -> bool:
+    """If the file is a friends list, returns whether the user confirms outputting it. Otherwise returns True."""
     warning_msg = """About to output a player's friends list to a file. Note that for any additional
                      friends not currently in such a 'standard list', their displayed old name in
                      parentheses going forward will be their ign as of today.
                      To proceed, press y: """
     warning_msg = ' '.join(warning_msg.split()) + ' '
-    if description.lower().startswith('friends of') and input(warning_msg).lower() != 'y':
-        return
-    write_to_file(json.dumps(data, indent=4), description, folder_name)
-
-def write_to_file(text: str, description: str, folder_name: str) -> None:
-    with open(create_file(description, folder_name), "w") as f:
-        f.write(text)
+    return not description.lower().startswith('friends of') or input(warning_msg).lower() == 'y'
 
-def create_file(description: str, folder_name: str) -> str:
+def create_file(description: str, folder_name: str, extension: str = ".txt") -> str:
     """Creates a file using the params and returns the name of the file, which can be used by the caller if desired."""
-    filename = os.path.join(folder_name, Utils.trim_if_needed(f"{description} - {time.time_ns()}.txt"))
+    filename = os.path.join(folder_name, Utils.trim_if_needed(f"{description} - {time.time_ns()}{extension}"))
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     return filename
 
-def ign_uuid_pairs_in_uuids_txt(do_deepcopy: bool = False) -> dict[str, str]:
-    """Retrieves pairs stored in the uuids.txt file as a dict - key ign, value uuid"""
+def ign_uuid_pairs_in_uuids_txt() -> Mapping[str, str]:
+    """Retrieves pairs stored in the uuids.txt file as a read-only view - key ign, value uuid"""
     global _ign_uuid_pairs_uuids_txt
     if _ign_uuid_pairs_uuids_txt is None:
-        _ign_uuid_pairs_uuids_txt = read_pairs_from_file(UUIDS_FILENAME)
-        assert all(k == k.lower() for k in _ign_uuid_pairs_uuids_txt)
-    return deepcopy(_ign_uuid_pairs_uuids_txt) if do_deepcopy else _ign_uuid_pairs_uuids_txt
-
-def ign_uuid_pairs_in_hypickle_cache() -> dict[str, str]:
-    """Returns all pairs in files less than 30 mins old (since the current run began)."""
-    global _ign_uuid_pairs_hypickle_cache
-    if not os.path.isdir(HYPICKLE_CACHE_FOLDER):
-        return {}
-    if _ign_uuid_pairs_hypickle_cache is None:
-        _ign_uuid_pairs_hypickle_cache = {}
-        filepaths = sorted(Path(HYPICKLE_CACHE_FOLDER).iterdir(), key=os.path.getmtime)
-        seconds_obsolete = 1800
-        should_clean_cache = (
-            sum(1 for p in filepaths if modified_secs_ago(p) >= seconds_obsolete) > 50 and
-            input('Recommended to delete old files in the `hypickle_cache` folder - press y to do so: ')
-                  == 'y'
-        )
-        for p in filepaths:
-            assert p.name.startswith('ign_uuid_pair - ') and p.name.endswith('.txt') and len(p.name) == 39
-            if modified_secs_ago(p) < seconds_obsolete:
-                _ign_uuid_pairs_hypickle_cache.update(
-                    read_pairs_from_file(os.path.join(HYPICKLE_CACHE_FOLDER, p.name))
-                )
-            elif should_clean_cache:
-                p.unlink()
-    assert all(k == k.lower() and v == v.lower() for k,v in _ign_uuid_pairs_hypickle_cache.items())
-    return _ign_uuid_pairs_hypickle_cache
-
-def update_hypickle_cache(ign: str, uuid: str) -> None:
-    ign_uuid_pairs_in_hypickle_cache()[(ign := ign.lower())] = uuid
-    write_to_file(f"{ign} {uuid}", "ign_uuid_pair", HYPICKLE_CACHE_FOLDER)
+        pairs = read_journaled_pairs(UUIDS_FILENAME)
+        assert all(k == k.lower() for k in pairs)
+        _ign_uuid_pairs_uuids_txt = MappingProxyType(pairs)
+    return _ign_uuid_pairs_uuids_txt
+
+def is_json_file(filepath: str) -> bool:
+    return filepath.endswith('.txt') or filepath.endswith(COMPRESSED_EXTENSION)
+
+def is_friends_file(arg: str) -> bool:
+    """Returns whether the arg is the path of a file to read friends lists from (json or an archive)."""
+    return is_json_file(arg) or arg.endswith(ARCHIVE_EXTENSION)
+
+def without_extension(filepath: str) -> str:
+    """Returns the filepath without its extension (where '.txt.gz' counts as one extension)."""
+    if filepath.endswith(COMPRESSED_EXTENSION):
+        return filepath[:-len(COMPRESSED_EXTENSION)]
+    return os.path.splitext(filepath)[0]
+
+def open_text(filepath: str, write: bool = False) -> IO[str]:
+    """Opens the text file for reading or writing, decompressing/compressing it if it's gzip compressed."""
+    if filepath.endswith(COMPRESSED_EXTENSION):
+        return gzip.open(filepath, 'wt' if write else 'rt', compresslevel=6)
+    return open(filepath, 'w' if write else 'r')
 
 def read_json_textfile(filepath: str) -> dict:
     try:
-        with open(filepath, 'r') as f:
-            return json.loads(f.read())
+        with open_text(filepath) as f:
+            return json.load(f)
     except FileNotFoundError:
         # This could happen if the user gives a windows path when running the program with wsl. So try this:
-        with open('results/' + ntpath.basename(filepath), 'r') as f:
-            return json.loads(f.read())
+        with open_text('results/' + ntpath.basename(filepath)) as f:
+            return json.load(f)
+
+def compress_files(filepaths: Iterable[str]) -> None:
+    """Compresses these json files (any that already are compressed are skipped). Each compressed file keeps the
+       original's mtime, and the original is only deleted once the compressed file is checked to have the same
+       contents."""
+    num_compressed, old_size, new_size = 0, 0, 0
+    for filepath in filepaths:
+        if filepath.endswith(COMPRESSED_EXTENSION):
+            continue
+        compressed_path = without_extension(filepath) + COMPRESSED_EXTENSION
+        temp_path = compressed_path + '.tmp'
+        with open(filepath, 'rb') as f, gzip.open(temp_path, 'wb', compresslevel=6) as out:
+            shutil.copyfileobj(f, out)
+        with open(filepath, 'rb') as f, gzip.open(temp_path, 'rb') as compressed:
+            same_contents = _same_contents(f, compressed)
+        if not same_contents:
+            print(f"Leaving {filepath} uncompressed, since its compressed file didn't have the same contents")
+            os.remove(temp_path)
+            continue
+        stat = os.stat(filepath)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, compressed_path)
+        os.remove(filepath)
+        num_compressed, old_size, new_size = (num_compressed + 1, old_size + stat.st_size,
+                                              new_size + os.path.getsize(compressed_path))
+    print(f"Compressed {num_compressed} files, going from {old_size} to {new_size} bytes.")
+
+def _same_contents(f: IO[bytes], compressed: gzip.GzipFile) -> bool:
+    while chunk := f.read(1 << 16):
+        if compressed.read(len(chunk)) != chunk:
+            return False
+    return not compressed.read(1)
 
-def update_uuids_file(ign_uuid_pairs: dict[str, str]) -> None:
+def update_uuids_file(ign_uuid_pairs: Mapping[str, str]) -> None:
     """Updates the uuids.txt file with the ign_uuid_pairs param.
     If a uuid is found for an ign in uuids.txt that conflicts with a pair in the passed in param,
-    it will be replaced. Also, this function will make a backup of uuids.txt before overwriting it."""
-
-    if os.path.isfile(UUIDS_FILENAME):
-        shutil.copy(UUIDS_FILENAME, create_file('uuids copy', 'old-uuids'))
-    pairs = ign_uuid_pairs_in_uuids_txt(do_deepcopy=True)
+    it will be replaced. Only the changed pairs are written (to the journal), and they can be undone with
+    `restore_journaled_pairs`."""
+    pairs = dict(old_pairs := ign_uuid_pairs_in_uuids_txt())
     pairs.update(ign_uuid_pairs)
     assert all(k == k.lower() for k in pairs)
-    write_pairs_to_file(pairs, UUIDS_FILENAME)
+    write_journaled_pairs(UUIDS_FILENAME, old_pairs, pairs)
     print(f"{UUIDS_FILENAME} now contains uuid-ign pairs for {len(pairs)} players.")
 
-def write_pairs_to_file(pairs: dict[str, str], filepath: str) -> None:
-    """If the file exists, it will be overwritten. Otherwise, it will be created and written to.
-       The format of the text will be one pair per line, with a space between each counterpart."""
-    with open(filepath, "w") as file:
-        for key, value in pairs.items():
-            file.write(f"{key} {value}\n")
+def _read_snapshot(filepath: str) -> dict[str, str]:
+    return read_aliases_snapshot(filepath) if filepath == ALIASES_FILENAME else read_pairs_from_file(filepath)
+
+def _write_snapshot(filepath: str, pairs: Mapping[str, str]) -> None:
+    """Writes the snapshot to a temporary file first, so that it's replaced all at once."""
+    with open(temp_path := filepath + '.tmp', 'w') as file:
+        if filepath == ALIASES_FILENAME:
+            file.writelines(f'"{a}" = "{m}"\n' for a, m in sorted(pairs.items()))
+        else:
+            file.writelines(f"{key} {value}\n" for key, value in pairs.items())
+    os.replace(temp_path, filepath)
+
+def _journal_entries(filepath: str) -> Iterator[tuple[float, str, Optional[str]]]:
+    """Yields the (time, key, value) of each entry in the journal or history file. The value is None if
+       the key was deleted."""
+    if not os.path.isfile(filepath):
+        return
+    with open(filepath) as file:
+        for line in file:
+            timestamp, key, *value = line.rstrip('\n').split('\t')
+            yield (float(timestamp), key, value[0] if value else None)
+
+def _apply_entries(pairs: dict[str, str], entries: Iterable[tuple[float, str, Optional[str]]]) -> dict[str, str]:
+    for _, key, value in entries:
+        if value is None:
+            pairs.pop(key, None)
+        else:
+            pairs[key] = value
+    return pairs
+
+def _append_entries(filepath: str, entries: Iterable[tuple[float, str, Optional[str]]]) -> None:
+    """Appends the entries as tab separated lines, so keys and values can't have tabs or newlines."""
+    entries = list(entries)
+    assert not any(c in f"{key}{value}" for _, key, value in entries for c in '\t\n'), "Can't journal tabs/newlines"
+    with open(filepath, 'a') as file:
+        file.writelines(f"{timestamp}\t{key}\n" if value is None else f"{timestamp}\t{key}\t{value}\n"
+                        for timestamp, key, value in entries)
+
+def read_journaled_pairs(filepath: str) -> dict[str, str]:
+    """Returns the pairs in the snapshot, with the journal's changes applied."""
+    return _apply_entries(_read_snapshot(filepath), _journal_entries(filepath + JOURNAL_SUFFIX))
+
+def write_journaled_pairs(filepath: str, old_pairs: Mapping[str, str], new_pairs: Mapping[str, str]) -> None:
+    """Records the changes from `old_pairs` (what's currently stored) to `new_pairs` in the journal, compacting
+       it if it's gotten long enough."""
+    journal_path, history_path = filepath + JOURNAL_SUFFIX, filepath + HISTORY_SUFFIX
+    if os.path.isfile(filepath) and not os.path.isfile(journal_path) and not os.path.isfile(history_path):
+        # So that the history starts with the pairs that were there before there was a journal:
+        _append_entries(history_path, ((os.path.getmtime(filepath), k, v) for k, v in _read_snapshot(filepath).items()))
+    now = time.time()
+    _append_entries(journal_path, [(now, k, None) for k in old_pairs.keys() - new_pairs.keys()] +
+                                  [(now, k, v) for k, v in new_pairs.items() if old_pairs.get(k) != v])
+    if sum(1 for _ in _journal_entries(journal_path)) >= COMPACT_AFTER_ENTRIES:
+        _write_snapshot(filepath, new_pairs)
+        with open(journal_path) as journal, open(history_path, 'a') as history:
+            shutil.copyfileobj(journal, history)
+        os.remove(journal_path)
+    elif not os.path.isfile(filepath):
+        _write_snapshot(filepath, {})
+
+def restore_journaled_pairs(filepath: str, date_string: str) -> None:
+    """Restores the pairs to how they were at the start of this date. The restore is recorded in the journal
+       like any other change, so it can be undone the same way."""
+    cutoff = Utils.date_to_epoch(date_string, True)
+    restored = _apply_entries({}, (entry for path in (filepath + HISTORY_SUFFIX, filepath + JOURNAL_SUFFIX)
+                                   for entry in _journal_entries(path) if entry[0] < cutoff))
+    current = read_journaled_pairs(filepath)
+    write_journaled_pairs(filepath, current, restored)
+    print(f"Restored {filepath} to its {len(restored)} pairs as of {date_string} (it had {len(current)}).")
 
 def read_pairs_from_file(filepath: str) -> dict[str, str]:
     """Each line should contain one pair, with the counterparts separated by a space.
@@ -132,7 +230,7 @@ def get_new_aliases_from_user(aliases: dict[str, str], keywords: Iterable[str])
         alias = input("Enter alias (or 'done'/'stop' to quit): ").lower()
         if alias in ('done', 'stop', 'quit'):
             return
-        meaning = input("Enter the text this alias stands for: ").lower()
+        meaning = ' '.join(input("Enter the text this alias stands for: ").lower().split())
         if meaning in ('del', 'delete', 'remove'):
             if input(f"Confirm you want to delete the {alias} alias by entering y: ") in ('y', 'Y'):
                 del aliases[alias]
@@ -171,17 +269,13 @@ def update_aliases(
         2-tuple in `ign_uuid_pairs` and makes the ign (first elem) an alias for the uuid (second elem). """
     print_aliases()
     aliases: dict[str, str] = get_aliases_with_str_meanings()
-    aliases_copy = deepcopy(aliases)
+    aliases_copy = dict(aliases)
     if ign_uuid_pairs is None:
         get_new_aliases_from_user(aliases, keywords)
     else:
         add_new_ign_uuid_aliases(aliases, ign_uuid_pairs, keywords)
 
-    if os.path.isfile(ALIASES_FILENAME):
-        shutil.copy(ALIASES_FILENAME, create_file('aliases copy', 'old-aliases'))
-    with open(ALIASES_FILENAME, 'w') as file:
-        for a,m in sorted(aliases.items()):
-            file.write(f'"{a}" = "{m}"\n')
+    write_journaled_pairs(ALIASES_FILENAME, aliases_copy, aliases)
 
     print_aliases(starting_phrase="\nNow")
     assert aliases == get_aliases_with_str_meanings()
@@ -195,18 +289,20 @@ def get_aliases_with_str_meanings() -> dict[str, str]:
     return {a: ' '.join(m) for a,m in get_aliases().items()}
 
 def get_aliases() -> dict[str, list[str]]:
-    """ Returns a list representing the aliases stored in aliases.txt. Each element of this list
-        will be a tuple, where the first element is a string (the alias), and the second element
-        is a list of strings (what the alias stands for). """
-    if not os.path.isfile(ALIASES_FILENAME):
+    """ Returns a dict representing the aliases stored in aliases.txt (and its journal). Each key is an
+        alias, and its value is a list of strings (what the alias stands for). """
+    return {a: m.split() for a, m in read_journaled_pairs(ALIASES_FILENAME).items()}
+
+def read_aliases_snapshot(filepath: str) -> dict[str, str]:
+    if not os.path.isfile(filepath):
         return {}
-    with open(ALIASES_FILENAME, 'r') as file:
+    with open(filepath, 'r') as file:
         lines: list[str] = file.read().splitlines()
-    aliases: dict[str, list[str]] = {}
+    aliases: dict[str, str] = {}
     for line in lines:
         split_line = [x.strip(whitespace + '"') for x in line.split('=')]
         assert line.count('=') == 1 and len(split_line) == 2 and line == line.lower()
-        aliases[split_line[0]] = split_line[1].split()
+        aliases[split_line[0]] = ' '.join(split_line[1].split())
     return aliases
 
 def print_aliases(starting_phrase: str = 'Currently') -> None:
@@ -217,19 +313,44 @@ def print_aliases(starting_phrase: str = 'Currently') -> None:
     print()
 
 def apply_aliases(lst: list[str]) -> list[str]:
-    """Returns a new list that results from applying the aliases (in aliases.txt) to the strings in lst."""
-    old_lst = lst
-    for alias in (aliases := get_aliases()):
-        lst = Utils.replace_in_list(lst, alias, aliases[alias])
-    # If lst got updated, keep recursing (as some aliases may have aliases of their own):
-    return apply_aliases(lst) if lst != old_lst else lst
-
-def modified_secs_ago(p: Path) -> float:
-    return time.time() - os.path.getmtime(p)
-
-def get_nth_line(filepath: str, i: int) -> str:
-    """Returns the ith line (not including whitespace-only lines). The line returned will have trailing
-       whitespace removed, if it contains any.
-       Note that i = 0 would mean the first line, i = -1 would mean the last."""
+    """Returns a new list that results from applying the aliases (in aliases.txt) to the strings in lst.
+       Aliases are matched case-insensitively, and are fully expanded (as some may have aliases of their own)."""
+    expansions = compiled_aliases()
+    return [word for s in lst for word in expansions.get(s.lower(), (s,))]
+
+def compiled_aliases() -> dict[str, list[str]]:
+    """Returns what each alias stands for, with any aliases in its meaning expanded too. This is only compiled
+       again once aliases.txt or its journal changes."""
+    global _compiled_aliases
+    stamp = tuple((stat.st_ino, stat.st_mtime_ns, stat.st_size) if (stat := _stat_if_exists(path)) else None
+                  for path in (ALIASES_FILENAME, ALIASES_FILENAME + JOURNAL_SUFFIX))
+    if _compiled_aliases is None or _compiled_aliases[0] != stamp:
+        _compiled_aliases = (stamp, _compile_aliases(get_aliases()))
+    return _compiled_aliases[1]
+
+def _stat_if_exists(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+def _compile_aliases(aliases: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Raises a RuntimeError if an alias's meaning leads back to itself."""
+    expansions: dict[str, list[str]] = {}
+    def expand(alias: str, path: list[str]) -> list[str]:
+        if alias in path:
+            raise RuntimeError(f"These aliases are cyclic: {' -> '.join(path[path.index(alias):] + [alias])}")
+        if alias not in expansions:
+            path.append(alias)
+            expansions[alias] = [word for w in aliases[alias] for word in (expand(w, path) if w in aliases else [w])]
+            path.pop()
+        return expansions[alias]
+    for alias in aliases:
+        expand(alias, [])
+    return expansions
+
+def get_lines(filepath: str) -> list[str]:
+    """Returns the lines of the file (not including whitespace-only lines), with any trailing
+       whitespace removed."""
     with open(filepath, 'r') as f:
-        return [line.rstrip() for line in f if line.strip()][i]
\ No newline at end of file
+        return [line.rstrip() for line in f if line.strip()]
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Contains the friend graph: every friendship recorded in the results folder, as an undirected graph over
+   the ids in UuidTable.py."""
+
+from __future__ import annotations
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Optional, Iterable
+
+from . import UuidTable
+
+class FriendGraph:
+    """Built once from the friends lists of many players, after which it's only queried. A node that has
+       no friendships recorded (including any id past the ones the graph was built with) is isolated.
+       It's stored in compressed sparse row form - the neighbours of all nodes concatenated in one array
+       (sorted by node, then by neighbour), and an array of where each node's neighbours start - so a node's
+       neighbours are a slice, and the whole graph is two flat arrays."""
+
+    __slots__ = ('_offsets', '_neighbours')
+
+    @classmethod
+    def from_friends_lists(cls, friends_lists: Iterable[tuple[int, Iterable[int]]]) -> FriendGraph:
+        """Each friends list is the id of a player, and the ids of their friends. Every friend is made a
+           neighbour of the player and vice versa, however many lists the friendship is in."""
+        edges = array('Q') # Each edge in both directions, as (node << 32) | neighbour.
+        for uuid_id, friend_ids in friends_lists:
+            friend_ids = [friend_id for friend_id in friend_ids if friend_id != uuid_id]
+            edges.extend([uuid_id << 32 | friend_id for friend_id in friend_ids])
+            edges.extend([friend_id << 32 | uuid_id for friend_id in friend_ids])
+        sorted_edges = array('Q', sorted(set(edges)))
+        num_nodes = (sorted_edges[-1] >> 32) + 1 if sorted_edges else 0
+        halves = array('I') # Each edge's neighbour and node, as the two halves of its 64 bit value.
+        halves.frombytes(sorted_edges.tobytes())
+        offsets = array('I', (bisect_left(sorted_edges, uuid_id << 32) for uuid_id in range(num_nodes + 1)))
+        return FriendGraph(offsets, halves[0::2] if sys.byteorder == 'little' else halves[1::2])
+
+    def __init__(self, offsets: array, neighbours: array) -> None:
+        """`offsets` has one more element than there are nodes, with node i's neighbours being
+           neighbours[offsets[i]:offsets[i+1]]."""
+        assert len(offsets) >= 1 and offsets[0] == 0 and offsets[-1] == len(neighbours)
+        self._offsets = offsets
+        self._neighbours = neighbours
+
+    def num_nodes(self) -> int:
+        return len(self._offsets) - 1
+
+    def num_edges(self) -> int:
+        """Returns the number of friendships (each one being stored in both directions)."""
+        return len(self._neighbours) // 2
+
+    def _neighbour_ids(self, uuid_id: int) -> array:
+        if uuid_id >= self.num_nodes():
+            return array('I')
+        return self._neighbours[self._offsets[uuid_id]:self._offsets[uuid_id+1]]
+
+    def degree(self, uuid: str) -> int:
+        """Returns the number of distinct friends recorded for this uuid."""
+        if (uuid_id := UuidTable.get_id(uuid)) is None or uuid_id >= self.num_nodes():
+            return 0
+        return self._offsets[uuid_id+1] - self._offsets[uuid_id]
+
+    def neighbours(self, uuid: str) -> list[str]:
+        """Returns the uuids of this uuid's friends, in the order of their ids."""
+        if (uuid_id := UuidTable.get_id(uuid)) is None:
+            return []
+        return UuidTable.to_uuids(self._neighbour_ids(uuid_id))
+
+    def shortest_path(self, uuid: str, other_uuid: str) -> Optional[list[str]]:
+        """Returns the uuids along a shortest chain of friendships from `uuid` to `other_uuid` (both included),
+           or None if there's no chain. The search goes outwards from both ends, a layer at a time from
+           whichever end has the smaller frontier, until the two meet."""
+        start, end = UuidTable.get_id(uuid), UuidTable.get_id(other_uuid)
+        if start is None or end is None:
+            return None if uuid != other_uuid else [uuid]
+        # For each side, maps each node reached to the node it was reached from (or -1 for the start/end):
+        parents: tuple[dict[int, int], dict[int, int]] = ({start: -1}, {end: -1})
+        frontiers = ([start], [end])
+        meeting_node = start if start == end else None
+        while meeting_node is None and frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            reached, other_reached = parents[side], parents[1 - side]
+            next_frontier = []
+            for node in frontiers[side]:
+                for neighbour in self._neighbour_ids(node):
+                    if neighbour not in reached:
+                        reached[neighbour] = node
+                        next_frontier.append(neighbour)
+                        if neighbour in other_reached:
+                            meeting_node = neighbour
+                            break
+                if meeting_node is not None:
+                    break
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+        if meeting_node is None:
+            return None
+        path = [meeting_node]
+        while (node := parents[0][path[-1]]) != -1:
+            path.append(node)
+        path.reverse()
+        while (node := parents[1][path[-1]]) != -1:
+            path.append(node)
+        return UuidTable.to_uuids(path)
+
+    def distance(self, uuid: str, other_uuid: str) -> Optional[int]:
+        """Returns the fewest friendships needed to get from one uuid to the other, or None if it can't be done."""
+        path = self.shortest_path(uuid, other_uuid)
+        return None if path is None else len(path) - 1
+
+    def hop_layers(self, uuid: str, max_hops: int) -> list[list[str]]:
+        """Returns the uuids at each distance from this uuid, from 0 (just the uuid itself) up to `max_hops`
+           (leaving off any distances past the last one reached). Together these make up its k-hop neighbourhood."""
+        assert max_hops >= 0
+        if (uuid_id := UuidTable.get_id(uuid)) is None:
+            return [[uuid]]
+        visited = bytearray(max(self.num_nodes(), uuid_id + 1))
+        visited[uuid_id] = 1
+        layers = [[uuid_id]]
+        offsets, neighbours = self._offsets, self._neighbours
+        while len(layers) <= max_hops:
+            next_layer = []
+            for node in layers[-1]:
+                if node >= self.num_nodes():
+                    continue
+                for neighbour in neighbours[offsets[node]:offsets[node+1]]:
+                    if not visited[neighbour]:
+                        visited[neighbour] = 1
+                        next_layer.append(neighbour)
+            if not next_layer:
+                break
+            layers.append(next_layer)
+        return [UuidTable.to_uuids(layer) for layer in layers]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+from array import array
+import math
+from typing import Optional, Iterable, Collection
+
+from . import Utils
+from . import UuidTable
+from .MyClasses import UUID_Plus_Time
+
+class FriendList:
+    """A friends list, stored as two parallel arrays: the id of each friend's uuid (see UuidTable.py), and
+       the time they were friended in epoch milliseconds (nan if it isn't known). Operations return a new
+       FriendList rather than modifying this one."""
+
+    __slots__ = ('_ids', '_times')
+
+    @classmethod
+    def from_uuid_plus_times(cls, friends: Iterable[UUID_Plus_Time]) -> FriendList:
+        friends = list(friends)
+        return FriendList(array('I', (UuidTable.to_id(f.uuid()) for f in friends)),
+                          array('d', (math.nan if (t := f.time_epoch_in_milliseconds()) is None else t
+                                      for f in friends)))
+
+    def __init__(self, ids: Optional[array] = None, times: Optional[array] = None) -> None:
+        self._ids: array = ids if ids is not None else array('I')
+        self._times: array = times if times is not None else array('d')
+        assert len(self._ids) == len(self._times)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def ids(self) -> array:
+        return self._ids
+
+    def times(self) -> array:
+        return self._times
+
+    def uuid(self, i: int) -> str:
+        return UuidTable.to_uuid(self._ids[i])
+
+    def uuids(self) -> list[str]:
+        return UuidTable.to_uuids(self._ids)
+
+    def time_ms(self, i: int) -> Optional[float]:
+        return None if math.isnan(t := self._times[i]) else t
+
+    def sort_keys(self) -> list[float]:
+        """Returns the key each friend is sorted by: the time friended, or 0 if it isn't known."""
+        return [0 if math.isnan(t) else t for t in self._times]
+
+    def take(self, indexes: Iterable[int]) -> FriendList:
+        """Returns a FriendList with the friends at these indexes, in the same order as `indexes`."""
+        indexes = list(indexes)
+        return FriendList(array('I', map(self._ids.__getitem__, indexes)),
+                          array('d', map(self._times.__getitem__, indexes)))
+
+    def sorted_by_time(self) -> FriendList:
+        """Returns the friends sorted from most to least recently friended (with any unknown times last).
+           Ties keep their order."""
+        return self.take(sorted(range(len(self)), key=self.sort_keys().__getitem__, reverse=True))
+
+    def added_since(self, date_cutoff: str) -> FriendList:
+        """Returns the friends who were friended at or after the cutoff (so any unknown times are left out)."""
+        cutoff_ms = Utils.convert_to_seconds(date_cutoff) * 1000
+        return self.take(i for i, t in enumerate(self._times) if t >= cutoff_ms)
+
+    def first(self, n: int) -> FriendList:
+        assert 0 <= n <= len(self)
+        return FriendList(self._ids[:n], self._times[:n])
+
+    def last(self, n: int) -> FriendList:
+        assert 0 <= n <= len(self)
+        return FriendList(self._ids[len(self)-n:], self._times[len(self)-n:])
+
+    def deduplicated(self) -> FriendList:
+        """Returns the friends with any duplicates of an earlier friend's uuid left out."""
+        first_indexes: dict[int, int] = {}
+        for i, uuid_id in enumerate(self._ids):
+            first_indexes.setdefault(uuid_id, i)
+        return self if len(first_indexes) == len(self) else self.take(first_indexes.values())
+
+    def excluding(self, uuid_ids: Collection[int]) -> FriendList:
+        """Returns the friends whose uuid ids aren't in `uuid_ids`."""
+        return self.take(i for i, uuid_id in enumerate(self._ids) if uuid_id not in uuid_ids)
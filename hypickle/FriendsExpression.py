@@ -0,0 +1,166 @@
+"""Contains the parser and evaluator for the expressions in the cli args that say how to combine players'
+   friends lists (e.g., `a b intersect c - d` or `a - (b intersect c) e`)."""
+
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Iterator
+
+from . import Files
+from .FriendList import FriendList
+
+UNION, INTERSECT, MINUS = 'union', 'intersect', 'minus'
+
+@dataclass
+class Expression:
+    op: Optional[str] = None
+    """One of UNION, INTERSECT, or MINUS - or None if this expression is just an operand."""
+    operand: int = 0
+    """Only used when `op` is None. Indexes into the list of distinct operands the expression was parsed with."""
+    left: Optional[Expression] = None
+    right: Optional[Expression] = None
+
+    def describe(self, names: list[str], in_minus_section: bool = False) -> str:
+        """Returns the expression written out with the operands' names, in the format used for filenames
+           (e.g., 'a plus b intersect c minus d')."""
+        if self.op is None:
+            return names[self.operand]
+        assert self.left is not None and self.right is not None
+        left = self.left.describe(names, in_minus_section)
+        if self.left.op == MINUS:
+            left = f"({left})"
+        if self.op == MINUS:
+            right = self.right.describe(names, True)
+            return f"{left} minus " + (f"({right})" if self.right.op == MINUS else right)
+        right = f"({self.right.describe(names)})" if self.right.op is not None else self.right.describe(names)
+        return f"{left} {'intersect' if self.op == INTERSECT else 'minus' if in_minus_section else 'plus'} {right}"
+
+    def operand_uses(self, excluded: bool = False) -> Iterator[tuple[int, bool]]:
+        """Yields each operand in the expression, along with whether that use of it is excluded (i.e.,
+           it's in the right side of an odd number of MINUS expressions)."""
+        if self.op is None:
+            yield (self.operand, excluded)
+            return
+        assert self.left is not None and self.right is not None
+        yield from self.left.operand_uses(excluded)
+        yield from self.right.operand_uses(excluded != (self.op == MINUS))
+
+def tokenize(args: list[str]) -> list[str]:
+    """Splits any parentheses off the start/end of the args into their own tokens."""
+    tokens: list[str] = []
+    for arg in args:
+        stripped = arg.lstrip('(')
+        tokens.extend('(' * (len(arg) - len(stripped)))
+        inner = stripped.rstrip(')')
+        if inner:
+            tokens.append(inner)
+        tokens.extend(')' * (len(stripped) - len(inner)))
+    return tokens
+
+def parse(tokens: list[str]) -> tuple[Expression, list[tuple[str, Optional[str]]]]:
+    """Returns the expression, and the distinct operands it uses (in the order they first appear). Each operand
+       is a player, along with the results file (json or an archive) to get their friends from, if one was given.
+       Each player (or player + file) is only loaded once, however many times it appears. In the expression:
+         - Players next to each other have their friends lists unioned, unless the second is preceded by
+           `intersect`. These are applied left to right.
+         - Everything after a `-` is combined the same way (any further `-`s act as unions), and then
+           subtracted from what comes before the `-`.
+         - Parentheses group a sub-expression, which is then used like a single player."""
+    operands: list[tuple[str, Optional[str]]] = []
+    expression, i = _parse_expression(tokens, 0, operands)
+    assert i == len(tokens), f"Unexpected '{tokens[i]}' in the players given"
+    return (expression, operands)
+
+def _parse_expression(tokens: list[str], i: int,
+                      operands: list[tuple[str, Optional[str]]]) -> tuple[Expression, int]:
+    expression, i = _parse_fold(tokens, i, operands, False)
+    if i < len(tokens) and tokens[i] == '-':
+        subtracted, i = _parse_fold(tokens, i+1, operands, True)
+        expression = Expression(MINUS, left=expression, right=subtracted)
+    return (expression, i)
+
+def _parse_fold(tokens: list[str], i: int, operands: list[tuple[str, Optional[str]]],
+                in_minus_section: bool) -> tuple[Expression, int]:
+    """Parses operands that are unioned/intersected left to right, until a ')', the end of the tokens,
+       or (if not already in a minus section) a '-'."""
+    expression: Optional[Expression] = None
+    while i < len(tokens) and tokens[i] != ')':
+        if tokens[i] == '-':
+            if not in_minus_section:
+                break
+            i += 1
+            continue
+        op = UNION
+        if tokens[i] == 'intersect':
+            assert expression is not None, "'intersect' must come after a player"
+            op, i = INTERSECT, i+1
+        operand, i = _parse_operand(tokens, i, operands)
+        expression = operand if expression is None else Expression(op, left=expression, right=operand)
+    assert expression is not None, "Expected a player"
+    return (expression, i)
+
+def _parse_operand(tokens: list[str], i: int,
+                   operands: list[tuple[str, Optional[str]]]) -> tuple[Expression, int]:
+    assert i < len(tokens), "Expected a player"
+    if tokens[i] == '(':
+        expression, i = _parse_expression(tokens, i+1, operands)
+        assert i < len(tokens) and tokens[i] == ')', "Missing a ')'"
+        return (expression, i+1)
+    assert tokens[i] not in (')', '-', 'intersect') and not Files.is_friends_file(tokens[i])
+    textfile = tokens[i+1] if i+1 < len(tokens) and Files.is_friends_file(tokens[i+1]) else None
+    if (operand := (tokens[i], textfile)) not in operands:
+        operands.append(operand)
+    return (Expression(operand=operands.index(operand)), i + (2 if textfile else 1))
+
+def evaluate(expression: Expression, friends_lists: list[FriendList]) -> FriendList:
+    """Returns the friends that result from combining `friends_lists` (one per operand) as the expression
+       says. If a uuid is in multiple lists, the friend kept is the one friended most recently among the
+       lists the uuid is kept from (for INTERSECT and MINUS, that's just the left side). The result is
+       sorted by time friended (most recent first), with any ties in the order they'd appear if the lists
+       were concatenated as the expression goes. The lists are combined as bitmaps indexed by uuid id."""
+    num_bytes = (max((max(friends.ids()) for friends in friends_lists if friends), default=-1) + 8) // 8
+    operand_bitmaps: list[int] = []
+    # For each operand, maps each of its uuid ids to the time key and index of its best entry:
+    best_entries: list[dict[int, tuple[float, int]]] = []
+    for friends in friends_lists:
+        bits = bytearray(num_bytes)
+        entries: dict[int, tuple[float, int]] = {}
+        for i, (uuid_id, time_key) in enumerate(zip(friends.ids(), friends.sort_keys())):
+            bits[uuid_id >> 3] |= 1 << (uuid_id & 7)
+            if uuid_id not in entries or time_key > entries[uuid_id][0]:
+                entries[uuid_id] = (time_key, i)
+        operand_bitmaps.append(int.from_bytes(bits, 'little'))
+        best_entries.append(entries)
+
+    bitmaps: dict[int, int] = {} # Key is the id() of each sub-expression, value is its bitmap.
+    def evaluate_bitmap(e: Expression) -> int:
+        if e.op is None:
+            result = operand_bitmaps[e.operand]
+        else:
+            assert e.left is not None and e.right is not None
+            left, right = evaluate_bitmap(e.left), evaluate_bitmap(e.right)
+            result = (left | right if e.op == UNION else left & right if e.op == INTERSECT else left & ~right)
+        bitmaps[id(e)] = result
+        return result
+
+    def best_entry(e: Expression, uuid_id: int) -> tuple[float, tuple, int, int]:
+        """Returns the time key, position, operand, and index in that operand's list of the entry kept
+           for this id (which must be in `e`)."""
+        if e.op is None:
+            time_key, i = best_entries[e.operand][uuid_id]
+            return (time_key, (i,), e.operand, i)
+        assert e.left is not None and e.right is not None
+        if e.op != UNION:
+            return best_entry(e.left, uuid_id)
+        candidates = []
+        for side, sub_e in enumerate((e.left, e.right)):
+            if bitmaps[id(sub_e)] >> uuid_id & 1:
+                time_key, pos, operand, i = best_entry(sub_e, uuid_id)
+                candidates.append((time_key, (side, *pos), operand, i))
+        return min(candidates, key=lambda c: (-c[0], c[1]))
+
+    result_bytes = evaluate_bitmap(expression).to_bytes(num_bytes, 'little')
+    result_ids = [i*8 + bit for i, byte in enumerate(result_bytes) if byte for bit in range(8) if byte >> bit & 1]
+    kept = sorted((best_entry(expression, uuid_id) for uuid_id in result_ids), key=lambda k: (-k[0], k[1]))
+    return FriendList(array('I', (friends_lists[operand].ids()[i] for _, _, operand, i in kept)),
+                      array('d', (friends_lists[operand].times()[i] for _, _, operand, i in kept)))
@@ -0,0 +1,67 @@
+"""Contains the functions hypixel.py uses to decode response bodies, with `pysimdjson`/`orjson` if installed."""
+
+from __future__ import annotations
+import json
+import threading
+from typing import Any, Iterable, Optional, Callable
+
+_loads: Optional[Callable[[bytes], Any]] = None
+_parsers = threading.local()
+"""Each thread gets its own simdjson parser, since a parser can't be shared between threads (and the lazy
+   document it returns is only valid until the parser is used again)."""
+
+def _simdjson_parser() -> Any:
+    """Returns this thread's simdjson parser, or None if pysimdjson isn't installed."""
+    if not hasattr(_parsers, 'parser'):
+        try:
+            import simdjson # type: ignore
+            _parsers.parser = simdjson.Parser()
+        except ImportError:
+            _parsers.parser = None
+    return _parsers.parser
+
+def decode(content: bytes) -> Any:
+    """Decodes with `orjson` if it's installed (since it's a few times faster than the json module)."""
+    global _loads
+    if _loads is None:
+        try:
+            import orjson # type: ignore
+            _loads = orjson.loads
+        except ImportError:
+            _loads = json.loads
+    return _loads(content)
+
+def decode_paths(content: bytes, paths: Iterable[tuple[str, ...]]) -> dict:
+    """Returns a dict with just the values at these key paths of the json in `content`, nested the same way
+       they are in the json. Paths that don't exist are left out. If `pysimdjson` is installed, only what's
+       needed for the paths is parsed."""
+    if (parser := _simdjson_parser()) is None:
+        return project(decode(content), paths)
+    doc = parser.parse(content)
+    projection: dict = {}
+    for path in paths:
+        try:
+            val = doc.at_pointer('/' + '/'.join(k.replace('~', '~0').replace('/', '~1') for k in path))
+        except (KeyError, IndexError, TypeError):
+            continue
+        _set_nested(projection, path, val.as_dict() if hasattr(val, 'as_dict')
+                                      else val.as_list() if hasattr(val, 'as_list') else val)
+    return projection
+
+def project(d: dict, paths: Iterable[tuple[str, ...]]) -> dict:
+    """Like `decode_paths`, but for json that's already been decoded."""
+    projection: dict = {}
+    for path in paths:
+        val: Any = d
+        try:
+            for k in path:
+                val = val[k]
+        except (KeyError, IndexError, TypeError):
+            continue
+        _set_nested(projection, path, val)
+    return projection
+
+def _set_nested(d: dict, path: tuple[str, ...], val: Any) -> None:
+    for k in path[:-1]:
+        d = d.setdefault(k, {})
+    d[path[-1]] = val
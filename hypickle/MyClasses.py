@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import Optional
+from dataclasses import dataclass
+from typing import Optional, ClassVar
 import urllib3
 
 from . import Utils
@@ -54,22 +54,23 @@ class UUID_Plus_Time:
             return None
         return Utils.epoch_to_date(self._unix_epoch_milliseconds, False)
 
-    def sort_key(self) -> float:
-        if self._unix_epoch_milliseconds is None:
-            return 0
-        return -self._unix_epoch_milliseconds
-
-    def refers_to_same_person(self, other: UUID_Plus_Time) -> bool:
-        return self._uuid == other.uuid()
-
     def more_recent(self, other: UUID_Plus_Time) -> bool:
         return (self.time_epoch_in_milliseconds() or 0) > (other.time_epoch_in_milliseconds() or 0)
 
+@dataclass(frozen=True)
 class Specs:
     """This class represents specifications that a caller has when it calls the
-       create_dictionary_report_for_player function."""
+       create_dictionary_report_for_player function.
+       Specs are immutable, and there's only one instance for each combination of values, so they can
+       be shared (by Players and their friends) rather than copied."""
+
+    _just_uuids: bool
+    _player_must_be_online: bool
+    _friends_specs: Optional[Specs]
+    _degrees_from_original_player: int
 
-    _common_specs: dict = {'print player data': None, 'set flag': False}
+    _common_specs: ClassVar[dict] = {'print player data': None, 'set flag': False}
+    _instances: ClassVar[dict[tuple, Specs]] = {}
 
     @classmethod
     def set_common_specs(cls, print_player_data: bool) -> None:
@@ -90,13 +91,20 @@ class Specs:
         playerSpecs = Specs(False, False, friendsSpecs, 0)
         return playerSpecs
 
-    def __init__(self, just_uuids: bool, player_must_be_online: bool,
-                 friends_specs: Specs | None, degrees_from_original_player: int) -> None:
+    def __new__(cls, just_uuids: bool, player_must_be_online: bool,
+                friends_specs: Specs | None, degrees_from_original_player: int) -> Specs:
+        """Returns the existing instance with these values, if there is one."""
         assert Specs._common_specs['set flag']
-        self._just_uuids = just_uuids
-        self._player_must_be_online = player_must_be_online
-        self._friends_specs = deepcopy(friends_specs)
-        self._degrees_from_original_player = degrees_from_original_player
+        key = (just_uuids, player_must_be_online, friends_specs, degrees_from_original_player)
+        if (specs := cls._instances.get(key)) is None:
+            specs = cls._instances[key] = super().__new__(cls)
+        return specs
+
+    def __copy__(self) -> Specs:
+        return self
+
+    def __deepcopy__(self, _memo: dict) -> Specs:
+        return self
 
     def just_uuids(self) -> bool:
         return self._just_uuids
@@ -105,10 +113,7 @@ class Specs:
         return self._player_must_be_online
 
     def specs_for_friends(self) -> Specs | None:
-        return deepcopy(self._friends_specs)
-
-    def degrees_from_root_player(self) -> int:
-        return self._degrees_from_original_player
+        return self._friends_specs
 
     def root_player(self) -> bool:
         return self._degrees_from_original_player == 0
@@ -121,12 +126,3 @@ class Specs:
 
     def print_only_players_friends(self) -> bool:
         return Specs._get_value_for_key('print player data') and self.root_player()
-
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Specs):
-            raise ValueError("'other' is not an instance of Specs")
-        return (self.just_uuids() == other.just_uuids() and
-                self.degrees_from_root_player() == other.degrees_from_root_player() and
-                self.friend_of_root_player() == other.friend_of_root_player() and
-                self.required_online() == other.required_online() and
-                self.specs_for_friends() == other.specs_for_friends())
\ No newline at end of file
@@ -1,25 +1,31 @@
 from __future__ import annotations
 
 from typing import Optional, Union
-from copy import deepcopy
 from datetime import datetime
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 
 from . import Utils
 from . import hypixel
 from .MyClasses import UUID_Plus_Time, Specs, args
-from . import Files
+from . import Archive
 from .Pit import PitStats
 from . import ProcessingResults
 from . import leveling
 from . import Colours
+from . import UuidTable
+from .FriendList import FriendList
+
+FETCH_BATCH_SIZE = 50
+"""Number of friends whose api calls are made concurrently, in `iterate_over_friends_for_report`."""
 
 class Player:
 
     @classmethod
     def make_player_from_json_textfile(cls, filepath: str, uuid_or_ign: str,
                                        specs: Optional[Specs] = None) -> Player:
-        dict_from_file = Files.read_json_textfile(filepath)
+        dict_from_file = Archive.read_results_file(filepath)
         dict_for_player = Utils.find_dict_for_given_player(dict_from_file, uuid_or_ign)
         if not dict_for_player and Utils.is_ign(uuid_or_ign):
             # Possible nothing was found since the given json only contains the uuid for the player,
@@ -37,22 +43,24 @@ class Player:
 
     def __init__(self, uuid: str, time_friended_parent_player: Union[str, float, int, None] = None,
                  hypixel_object: Optional[hypixel.Player] = None, name: Optional[str] = None,
-                 friends: Union[list[UUID_Plus_Time], list[Player], None] = None, specs: Optional[Specs] = None,
+                 friends: Union[FriendList, list[UUID_Plus_Time], None] = None, specs: Optional[Specs] = None,
                  name_for_file_output: Optional[str] = None, will_exclude_friends: bool = False,
-                 date_cutoff_for_friends: Optional[str] = None, will_intersect: bool = False,
+                 date_cutoff_for_friends: Optional[str] = None,
                  players_used_to_combine: Optional[list[Player]] = None) -> None:
         self._uuid_plus_time = UUID_Plus_Time(uuid, time_friended_parent_player)
         self._hypixel_object = hypixel_object
         self._name = name
-        self._specs = deepcopy(specs)
+        self._specs = specs
         self._name_for_file_output = name_for_file_output
         self._will_exclude_friends = will_exclude_friends
-        self._will_intersect = will_intersect
         self._date_cutoff_for_friends = date_cutoff_for_friends
-        self._friends: Optional[list[Player]] = None
+        self._friends: Optional[FriendList] = None
+        self._friend_players: dict[int, Player] = {}
+        """The Players made so far for friends in `self._friends`, keyed by their index."""
         self._call_api_if_friends_empty_in_friends_getter: bool = True
         self._pit_stats: Optional[PitStats] = None
         self._players_used_to_combine = players_used_to_combine
+        self._prefetched_online_status: Optional[bool] = None
         if friends is not None:
             self._set_friends(friends)
 
@@ -70,7 +78,7 @@ class Player:
         return self._pit_stats
 
     def player_JSON(self) -> dict:
-        return self.hypixel_object().JSON
+        return self.hypixel_object().getRawJSON()
 
     def uuid(self) -> str:
         return self._uuid_plus_time.uuid()
@@ -96,14 +104,28 @@ class Player:
     def set_name_for_file_output(self, name: str) -> None:
         self._name_for_file_output = name
 
-    def friends(self) -> list[Player]:
+    def friend_list(self) -> FriendList:
         if not self._friends and self._call_api_if_friends_empty_in_friends_getter:
             self._set_friends(self.hypixel_object().getFriends())
-        return self._friends if self._friends is not None else []
+        return self._friends if self._friends is not None else FriendList()
+
+    def friend(self, i: int) -> Player:
+        """Returns a Player for the friend at index i. Players are only made for the friends this is called for."""
+        friends = self.friend_list()
+        if (player := self._friend_players.get(i)) is None:
+            specs_for_friends = self.specs_for_friends()
+            assert isinstance(specs_for_friends, Specs)
+            player = Player(friends.uuid(i), time_friended_parent_player=friends.time_ms(i))
+            player.set_specs(specs_for_friends)
+            self._friend_players[i] = player
+        return player
+
+    def friends(self) -> list[Player]:
+        return [self.friend(i) for i in range(len(self.friend_list()))]
 
     def specs(self) -> Specs:
         assert self._specs is not None
-        return deepcopy(self._specs)
+        return self._specs
 
     def root_player(self) -> bool:
         return self.specs().root_player()
@@ -144,16 +166,13 @@ class Player:
     def specs_for_friends(self) -> Specs | None:
         return self.specs().specs_for_friends()
 
-    def represents_same_person(self, other: Player) -> bool:
-        return self.uuid() == other.uuid()
-
     def set_specs(self, specs: Specs) -> None:
         self._specs = specs
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Player):
             raise ValueError("'other' is not an instance of Player.")
-        return (len(self.friends()) == len(other.friends()) and self.name() == other.name() and
+        return (len(self.friend_list()) == len(other.friend_list()) and self.name() == other.name() and
                 self._specs == other._specs and self.uuid() == other.uuid() and
                 self.time_friended_parent_player('date') == other.time_friended_parent_player('date'))
 
@@ -171,51 +190,41 @@ class Player:
         assert not self.will_exclude_friends()
         if not self._date_cutoff_for_friends or not self._friends:
             return
-        self._friends = [f for f in self._friends if not
-                         Utils.is_older(f.time_friended_parent_player('s'), self._date_cutoff_for_friends)]
+        self._replace_friends(self._friends.added_since(self._date_cutoff_for_friends))
 
     def remove_duplicate_friends(self) -> None:
         """Precondition: the friends list must be sorted in the order you want, since duplicates coming after any
-        originals will be removed. By a 'duplicate', this means a Player object with the same uuid."""
+        originals will be removed. By a 'duplicate', this means a friend with the same uuid."""
         assert self._friends is not None
-        self._set_friends([f for i, f in enumerate(self.friends()) if not f.in_player_list(self.friends()[:i])])
+        self._replace_friends(self._friends.deduplicated())
 
     def keep_just_first_or_last_friends(self, first_n: Optional[int] = None,
                                         last_n: Optional[int] = None) -> None:
         """Precondition: the friends list should already be sorted in the order you want."""
         assert self._friends is not None and (first_n is None or last_n is None)
         if first_n is not None:
-            assert 0 <= first_n <= len(self.friends())
-            self._set_friends(self.friends()[:first_n])
+            self._replace_friends(self.friend_list().first(first_n))
         elif last_n is not None:
-            assert 0 <= last_n <= len(self.friends())
-            self._set_friends(self.friends()[-last_n:] if last_n > 0 else []) # type: ignore
+            self._replace_friends(self.friend_list().last(last_n))
 
-    def _set_friends(self, friends: list[UUID_Plus_Time] | list[Player] | None) -> None:
-        """Note that after this function has been called, if self.friends() is called later and
-        self._friends happens to be None or [], the hypixel api won't be called to populate self._friends.
+    def _set_friends(self, friends: FriendList | list[UUID_Plus_Time] | None) -> None:
+        """Note that after this function has been called, if self.friend_list() is called later and
+        self._friends happens to be None or empty, the hypixel api won't be called to populate self._friends.
         The reasoning for this is that since self._set_friends() is being called now, it's assumed the
         caller wants self._friends to be equal to a certain value -- and None or [] are valid values
         if that's what the caller wants."""
 
         self._call_api_if_friends_empty_in_friends_getter = False
-        if not friends:
-            self._friends = None if friends is None else []
-            # Above line instead of direct assignment in order to satisfy mypy.
-            return
-        self._friends = []
-        for friend in deepcopy(friends):
-            if isinstance(friend, UUID_Plus_Time):
-                self._friends.append(Player(friend.uuid(),
-                                            time_friended_parent_player=friend.time_epoch_in_seconds()))
-            else:
-                self._friends.append(friend)
-            specs_for_friends = self.specs_for_friends()
-            assert isinstance(specs_for_friends, Specs)
-            self._friends[len(self._friends)-1].set_specs(specs_for_friends)
-        if not self.will_exclude_friends():
+        if isinstance(friends, list):
+            friends = FriendList.from_uuid_plus_times(friends)
+        self._replace_friends(friends)
+        if friends and not self.will_exclude_friends():
             self.remove_friends_added_before_cutoff()
 
+    def _replace_friends(self, friends: Optional[FriendList]) -> None:
+        self._friends = friends
+        self._friend_players = {}
+
     def will_exclude_friends(self) -> bool:
         """Returns whether this player's friends are meant to be excluded, as specified in command line args."""
         return self._will_exclude_friends
@@ -225,25 +234,12 @@ class Player:
             assert not self._date_cutoff_for_friends
         self._will_exclude_friends = exclude_friends
 
-    def will_intersect(self) -> bool:
-        """Returns whether this player's friends will be intersected with the friends (or exclude friends)
-           list leading up to it in combine_players."""
-        return self._will_intersect
-
-    def set_will_intersect(self, will_intersect: bool) -> None:
-        self._will_intersect = will_intersect
-
-    def in_player_list(self, players: list[Player]) -> bool:
-        """Returns whether the player is already represented in this players list."""
-        return any(self.represents_same_person(p) for p in players)
-
     def get_stats_dict(self) -> dict[str, str | float | int]:
         """Returns a dict with key-val pairs for uuid, name, fkdr, star, and pit_rank."""
         return {'uuid': self.uuid(), 'name': self.name(), 'fkdr': self.get_fkdr(),
                 'star': self.get_bw_star(), 'pit_rank': self.pit_rank_string()}
 
     def print_dict_report(self, report: dict, output_online_status: bool = False) -> None:
-        report = deepcopy(report)
         assert all(isinstance(v, (str,float,int)) for v in report.values())
         possible_keys = ('name', 'fkdr', 'star', 'pit_rank', 'uuid', 'time')
         assert {'uuid'} <= set(report.keys()) <= set(possible_keys)
@@ -288,17 +284,17 @@ class Player:
             print(f" friended {time_friended}".ljust(20), end='')
         print(recent_game_msg, end='')
         if output_online_status:
-            is_online = self.hypixel_object().isOnline((True,)*3)
+            is_online = self.hypixel_object().isOnline((True,)*3, use_cache=False)
             print(f"this arg player is {'online' if is_online else 'offline'}", end='')
             if is_online:
                 Utils.speak(f"{self.name()} is online" +
                             (f" and {recent_game_msg}" if recent_game_msg else ''))
-        if not just_uuids and (updated_json := self.hypixel_object().updated_json) is not None:
-            print(f" (updated player json obtained {updated_json[1].strftime('%I:%M:%S %p')})", end='')
+        if not just_uuids and (updated_record := self.hypixel_object().updated_record) is not None:
+            print(f" (updated player json obtained {updated_record[1].strftime('%I:%M:%S %p')})", end='')
         print()
 
     def print_player_info(self) -> None:
-        print(f"{len(self.friends())} unique friends total\n")
+        print(f"{len(self.friend_list())} unique friends total\n")
         nw_level = self.get_network_level()
         closest_multiple_50 = Utils.round_up_to_closest_multiple(nw_level, 50)
         percent_to_next_level = round(self.percent_way_to_next_network_level() * 100, 2)
@@ -318,9 +314,13 @@ class Player:
     def create_dictionary_report(self, sort_key: str = "fkdr", should_terminate: bool = True,
                                  on_first_pass: Optional[bool] = None) -> dict:
         assert not (self.root_player() and self.time_friended_parent_player('date'))
-        if (self.specs().required_online() and
-            not self.hypixel_object().isOnline((False, on_first_pass is False, False))):
-            return {}
+        if self.specs().required_online():
+            is_online = (self._prefetched_online_status if self._prefetched_online_status is not None
+                         else self.hypixel_object().isOnline((False, on_first_pass is False, False),
+                                                             use_cache=bool(on_first_pass)))
+            self._prefetched_online_status = None
+            if not is_online:
+                return {}
 
         report = self.get_stats_dict() if not self.specs().just_uuids() else {'uuid': self.uuid()}
         if time := self.time_friended_parent_player('date'):
@@ -348,17 +348,23 @@ class Player:
         if do_additional_passes:
             assert on_first_pass and self.root_player()
         assert isinstance(report['friends'], list)
-        if not (friends := self.friends()) and not self._players_used_to_combine:
+        if not (num_friends := len(self.friend_list())) and not self._players_used_to_combine:
             return
 
-        for i in range(len(friends) if end_index is None else end_index+1):
+        for i in range(num_friends if end_index is None else end_index+1):
             if do_additional_passes and i in (2**n*200 for n in range(0, 10)):
                 # Do a 'second pass' from 0 until i-1 indexed players, checking if their stats
                 # have been updated (for players who don't have the online status shown):
                 self.iterate_over_friends_for_report(report, False, sort_key,
                                                      False, False, end_index=i-1)
-            if (friends[i].uuid() not in (d['uuid'] for d in report['friends']) and
-                (friend_report := friends[i].create_dictionary_report(on_first_pass=on_first_pass))):
+            if i % FETCH_BATCH_SIZE == 0:
+                Player._prefetch_for_reports(
+                    [self.friend(j) for j in
+                     range(i, min(i+FETCH_BATCH_SIZE, num_friends if end_index is None else end_index+1))],
+                    {d['uuid'] for d in report['friends']}, on_first_pass
+                )
+            if (self.friend(i).uuid() not in (d['uuid'] for d in report['friends']) and
+                (friend_report := self.friend(i).create_dictionary_report(on_first_pass=on_first_pass))):
                 report['friends'].append(friend_report)
             self.processed_msg(i+1, on_perpetual_pass, on_first_pass)
 
@@ -368,6 +374,30 @@ class Player:
         if do_additional_passes:
             self.do_perpetual_passes(report, sort_key)
 
+    @staticmethod
+    def _prefetch_for_reports(players: list[Player], uuids_to_skip: set[str], on_first_pass: bool) -> None:
+        """Makes the api calls that `create_dictionary_report` would make for each player (besides those in
+           `uuids_to_skip`), using a pool of threads so that they're in flight at the same time.
+           Any rate limiting is still handled by `hypixel.getJSON`."""
+        for player in players:
+            player.discard_prefetched_online_status() # So that no status from an earlier batch/pass is used.
+        players = [p for p in players if p.uuid() not in uuids_to_skip]
+        with ThreadPoolExecutor(max_workers=hypixel.MAX_CONCURRENT_REQUESTS) as executor:
+            list(executor.map(Player.prefetch_for_report, players, repeat(on_first_pass)))
+
+    def prefetch_for_report(self, on_first_pass: bool) -> None:
+        """Fetches the player json (unless just the uuid is needed), and the online status if the specs
+           require the player to be online. The status is used by the next `create_dictionary_report` call."""
+        if self.specs().required_online() or not self.specs().just_uuids():
+            self.hypixel_object()
+        if self.specs().required_online():
+            self._prefetched_online_status = self.hypixel_object().isOnline(
+                (False, on_first_pass is False, False), use_cache=on_first_pass
+            )
+
+    def discard_prefetched_online_status(self) -> None:
+        self._prefetched_online_status = None
+
     def do_perpetual_passes(self, report: dict, sort_key: str) -> None:
         while True:
             report['friends'] = []
@@ -376,7 +406,7 @@ class Player:
     def processed_msg(self, num_processed: int, on_perpetual_pass: bool, on_first_pass: bool) -> None:
         """Prints a message at regular intervals saying how many friends have been processed,
            if the player is a root player."""
-        interval = min(50, len(self.friends()))
+        interval = min(50, len(self.friend_list()))
         if not self.root_player() or num_processed % interval != 0:
             return
         msg = f"Processed {num_processed}" + (
@@ -391,9 +421,9 @@ class Player:
         # Assert that there are no duplicate uuids:
         assert report['friends'] == list({f['uuid']:f for f in report['friends']}.values())
         print('\n')
-        uuid_friend_map = {f.uuid():f for f in self.friends()}
+        uuid_index_map = {uuid: i for i, uuid in enumerate(self.friend_list().uuids())}
         for d in report['friends']:
-            uuid_friend_map[d['uuid']].print_dict_report(d)
+            self.friend(uuid_index_map[d['uuid']]).print_dict_report(d)
         print('\n')
 
     @staticmethod
@@ -420,19 +450,20 @@ class Player:
         another Player. Other details (such as time friended parent player) can differ."""
         assert self._friends is not None
         self.remove_friends_added_before_cutoff() # Probably redundant
-        self._set_friends(sorted(self.friends(), key=lambda f: f.time_friended_parent_player('s') or 0, reverse=True))
+        self._replace_friends(self.friend_list().sorted_by_time())
         self.remove_duplicate_friends()
         if isinstance(friends_to_exclude, list):
-            self._set_friends([f for f in self.friends() if not f.in_player_list(friends_to_exclude)])
+            uuids_to_exclude = [f.uuid() for f in friends_to_exclude]
         elif isinstance(friends_to_exclude, dict):
-            self._set_friends([f for f in self.friends() if not f.uuid() in friends_to_exclude])
+            uuids_to_exclude = list(friends_to_exclude.keys())
         else:
             raise ValueError("friends_to_exclude must be a list or dict of Players")
+        self._replace_friends(self.friend_list().excluding({UuidTable.to_id(uuid) for uuid in uuids_to_exclude}))
 
     def diff_f_lists(self, other: Player, list_friends: bool) -> None:
-        diff = [f for f in self.friends() if not f.in_player_list(other.friends())]
+        diff = self.friend_list().excluding(set(other.friend_list().ids()))
         print(f"{len(diff)} friends of {self.name()} and not of {other.name()}")
         if list_friends:
-            for player in diff:
-                print(f"name: {player.name()}, uuid: {player.uuid()}")
+            for uuid in diff.uuids():
+                print(f"name: {Player(uuid).name()}, uuid: {uuid}")
         print('\n\n')
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from copy import deepcopy
+from copy import copy
 
 from .Colours import Hex, ColourSpecs, colour_print
 
@@ -29,12 +29,19 @@ class RankMap:
     @classmethod
     def json_rank_info(cls, key: str | None) -> tuple[str, RankColours]:
         """Returns the display string for a rank (without the brackets), as well as a RankColours
-           object detailing the colours to print in."""
-        return deepcopy(cls._rank_map[key])
+           object detailing the colours to print in. The RankColours is a copy, since Rank fills in its
+           UNKNOWN colours."""
+        display_rank, colours = cls._rank_map[key]
+        return (display_rank, copy(colours))
 
 class Rank:
+    JSON_KEYS = ('prefix', 'rank', 'monthlyPackageRank', 'newPackageRank', 'packageRank',
+                 'monthlyRankColor', 'rankPlusColor')
+    """The keys in a player's json that the rank is determined from."""
+
     def __init__(self, json: dict) -> None:
-        keys = ('prefix', 'rank', 'monthlyPackageRank', 'newPackageRank', 'packageRank')
+        """`json` only needs to contain the player json's values for `JSON_KEYS`."""
+        keys = Rank.JSON_KEYS[:5]
         none_vals = (None, 'NONE', 'NORMAL')
         rank_map_key = next(
             (v for v in (json.get(k) for k in keys) if v not in none_vals), None
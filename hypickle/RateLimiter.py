@@ -0,0 +1,85 @@
+"""Contains the limiter hypixel.py uses to keep requests within the api's rate limit."""
+
+from __future__ import annotations
+import threading
+from time import monotonic
+from typing import Mapping
+
+class RateLimiter:
+    """A leaky bucket which spreads requests evenly over what's left of the current rate limit window,
+       after allowing an initial burst. It's kept in sync with the api via the `RateLimit-*` headers of
+       each response, and is safe to share between threads."""
+
+    BURST_FRACTION = 0.1
+    """The fraction of a window's limit that can be sent back to back, before requests get spaced out."""
+
+    def __init__(self, limit: int = 300, window_secs: int = 300) -> None:
+        self._lock = threading.Lock()
+        self._limit, self._window_secs = limit, window_secs
+        self._in_flight = 0
+        """Number of requests reserved whose responses haven't been passed to `update` yet."""
+        self._remaining, self._reset_at, self._next_slot = self._new_window(monotonic())
+
+    def _new_window(self, start: float) -> tuple[int, float, float]:
+        """Returns the (remaining, reset_at, next_slot) state for a window beginning at `start`."""
+        return (self._limit, start + self._window_secs, start)
+
+    def _next_allowed_time(self, now: float, reserve: bool) -> float:
+        """Returns the (monotonic) time at which the next request can be sent. If `reserve` is True,
+           that request's slot is also taken."""
+        remaining, reset_at, next_slot = self._remaining, self._reset_at, self._next_slot
+        earliest = now
+        if now >= reset_at:
+            remaining, reset_at, next_slot = self._new_window(now)
+        elif remaining <= 0:
+            earliest = reset_at + 1
+            remaining, reset_at, next_slot = self._new_window(earliest)
+        slot = max(next_slot, earliest)
+        interval = max(0.0, reset_at - slot) / remaining
+        burst = max(1, int(self._limit * RateLimiter.BURST_FRACTION))
+        allowed_at = max(earliest, slot - interval * (burst - 1))
+        if reserve:
+            self._remaining, self._reset_at, self._next_slot = remaining - 1, reset_at, slot + interval
+            self._in_flight += 1
+        return allowed_at
+
+    def reserve(self) -> float:
+        """Takes the next slot for a request, and returns how many seconds the caller should wait
+           before sending it."""
+        with self._lock:
+            now = monotonic()
+            return max(0.0, self._next_allowed_time(now, True) - now)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Should be called once for each reserved request, after its response (if any) is received."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if 'RateLimit-Remaining' not in headers:
+                return
+            now = monotonic()
+            self._limit = int(headers['RateLimit-Limit'])
+            remaining, reset = int(headers['RateLimit-Remaining']), int(headers['RateLimit-Reset'])
+            if reset >= self._window_secs - 5:
+                # When starting a new rate limit period, it seems there's a bug in the api where the first
+                # response header gives a `RateLimit-Remaining` val that carries over from the previous period.
+                # Made an issue: https://github.com/HypixelDev/PublicAPI/issues/646
+                # So in this case, only use the header to see if the api has started a new window.
+                if now + reset > self._reset_at + 1:
+                    self._remaining, self._reset_at, self._next_slot = self._new_window(
+                        now + reset - self._window_secs
+                    )
+                    self._remaining -= 1 + self._in_flight
+                return
+            self._reset_at = now + reset
+            self._remaining = max(0, remaining - self._in_flight)
+
+    def budget(self) -> int:
+        """Returns how many more requests can be sent in the current window."""
+        with self._lock:
+            return self._limit if monotonic() >= self._reset_at else self._remaining
+
+    def projected_wait(self) -> float:
+        """Returns how many seconds a request reserved now would have to wait."""
+        with self._lock:
+            now = monotonic()
+            return max(0.0, self._next_allowed_time(now, False) - now)
@@ -0,0 +1,102 @@
+"""Contains the on-disk cache of api responses, which hypixel.py checks before spending any rate limit
+budget on a request. It also caches the uuids of igns that were looked up recently."""
+
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from . import Utils
+
+CACHE_FILENAME = "response_cache.db"
+TTL_SECS = {'player': 900, 'status': 30, 'recentgames': 60}
+"""How long a cached response stays valid for, for each endpoint that's cached. The stats in the
+   player endpoint are only used for sorting/display, so they can be older."""
+MAX_ENTRIES = 20000
+"""Once the cache holds more responses than this, the least recently used ones are evicted."""
+IGN_TTL_SECS = 1800
+"""How long a cached ign -> uuid pair stays valid for."""
+_EVICTION_CHECK_INTERVAL = 100
+_SCHEMA_VERSION = 1
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+_puts_since_eviction_check = 0
+_ign_puts_since_eviction_check = 0
+
+def is_cacheable(typeOfRequest: str, uuid_or_ign: Optional[str]) -> bool:
+    return typeOfRequest in TTL_SECS and uuid_or_ign is not None and Utils.is_uuid(uuid_or_ign)
+
+def _get_connection() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(CACHE_FILENAME, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("PRAGMA synchronous=NORMAL")
+        if _connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            # Older versions of the cache stored decoded json rather than the response body.
+            _connection.execute("DROP TABLE IF EXISTS responses")
+            _connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        _connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                   endpoint TEXT, uuid TEXT, fetched_at REAL, last_used REAL, body BLOB,
+                                   PRIMARY KEY (endpoint, uuid))""")
+        _connection.execute("CREATE INDEX IF NOT EXISTS last_used_index ON responses (last_used)")
+        _connection.execute("CREATE TABLE IF NOT EXISTS ign_uuids (ign TEXT PRIMARY KEY, uuid TEXT, fetched_at REAL)")
+    return _connection
+
+def close() -> None:
+    """Closes the connection to the cache (a new one is opened the next time the cache is used)."""
+    global _connection
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+
+def get(typeOfRequest: str, uuid: str) -> Optional[bytes]:
+    """Returns the body of the cached response for this request, or None if there isn't one young enough.
+       The body is stored undecoded, so that callers can decode just the parts of it they need."""
+    with _lock:
+        connection = _get_connection()
+        row = connection.execute("SELECT fetched_at, body FROM responses WHERE endpoint = ? AND uuid = ?",
+                                 (typeOfRequest, uuid)).fetchone()
+        if row is None or time.time() - row[0] > TTL_SECS[typeOfRequest]:
+            return None
+        connection.execute("UPDATE responses SET last_used = ? WHERE endpoint = ? AND uuid = ?",
+                           (time.time(), typeOfRequest, uuid))
+        connection.commit()
+    return bytes(row[1])
+
+def put(typeOfRequest: str, uuid: str, body: bytes) -> None:
+    global _puts_since_eviction_check
+    with _lock:
+        connection = _get_connection()
+        connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                           (typeOfRequest, uuid, (now := time.time()), now, body))
+        _puts_since_eviction_check += 1
+        if _puts_since_eviction_check >= _EVICTION_CHECK_INTERVAL:
+            _puts_since_eviction_check = 0
+            connection.execute("""DELETE FROM responses WHERE rowid IN (
+                                      SELECT rowid FROM responses ORDER BY last_used DESC
+                                      LIMIT -1 OFFSET ?)""", (MAX_ENTRIES,))
+        connection.commit()
+
+def get_uuid_for_ign(ign: str) -> Optional[str]:
+    """Returns the cached uuid of this ign, or None if there isn't one young enough."""
+    with _lock:
+        row = _get_connection().execute("SELECT uuid FROM ign_uuids WHERE ign = ? AND fetched_at > ?",
+                                        (ign.lower(), time.time() - IGN_TTL_SECS)).fetchone()
+    return None if row is None else row[0]
+
+def put_uuid_for_ign(ign: str, uuid: str) -> None:
+    """Caches the uuid of this ign. Expired pairs are deleted every so often, so the table stays small."""
+    global _ign_puts_since_eviction_check
+    with _lock:
+        connection = _get_connection()
+        connection.execute("INSERT OR REPLACE INTO ign_uuids VALUES (?, ?, ?)",
+                           (ign.lower(), uuid.lower(), time.time()))
+        _ign_puts_since_eviction_check += 1
+        if _ign_puts_since_eviction_check >= _EVICTION_CHECK_INTERVAL:
+            _ign_puts_since_eviction_check = 0
+            connection.execute("DELETE FROM ign_uuids WHERE fetched_at <= ?", (time.time() - IGN_TTL_SECS,))
+        connection.commit()
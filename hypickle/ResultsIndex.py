@@ -0,0 +1,266 @@
+"""Contains the persistent index of the results folder, which ProcessingResults.py queries instead of
+   reading every file in it. Each run, only the files that changed since the last run are parsed again."""
+
+from __future__ import annotations
+import os
+import sqlite3
+import math
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Iterator
+
+from . import Files, UuidTable, Archive, SnapshotStore
+from .MyClasses import args
+
+INDEX_FILENAME = "results_index.db"
+RESULTS_FOLDER = "results"
+NON_TRIVIAL_KEYS = ('friends', 'name', 'fkdr', 'star', 'pit_rank')
+_SCHEMA_VERSION = 3
+MIN_FILES_PER_WORKER = 64
+"""Files are only parsed in a process pool if there are at least this many per worker, since starting the
+   pool has a cost."""
+
+_connection: Optional[sqlite3.Connection] = None
+
+def _get_connection() -> sqlite3.Connection:
+    """Returns the connection to the index, which is brought up to date with the results folder the first
+       time this is called in a run."""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(INDEX_FILENAME)
+        if _connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            _connection.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS entries;")
+            _connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        _connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                file_id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER, additional INTEGER,
+                multi INTEGER);
+            CREATE TABLE IF NOT EXISTS entries (
+                file_id INTEGER, pos INTEGER, depth INTEGER, uuid_id INTEGER, name TEXT, fkdr REAL, star INTEGER,
+                pit_rank TEXT, num_keys INTEGER, non_trivial INTEGER, num_friends INTEGER,
+                friends_have_times INTEGER, friend_ids BLOB, friend_times BLOB, PRIMARY KEY (file_id, pos))
+                WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS uuid_index ON entries (uuid_id);
+        """)
+        max_id = _connection.execute("SELECT MAX(uuid_id) FROM entries").fetchone()[0]
+        if max_id is not None and max_id >= UuidTable.size():
+            # The uuid table was deleted or replaced, so the ids in the index are no longer valid.
+            with _connection:
+                _connection.executescript("DELETE FROM files; DELETE FROM entries;")
+        _refresh(_connection)
+    return _connection
+
+def close() -> None:
+    """Closes the connection to the index, so that the next query opens it again and refreshes it."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+def _refresh(connection: sqlite3.Connection) -> None:
+    """Reindexes the results files (json or archives) whose mtime or size changed, and the snapshots in the
+       snapshot store (which are indexed the same way as files)."""
+    indexed = {row[0]: (row[1], row[2]) for row in connection.execute("SELECT path, mtime, size FROM files")}
+    on_disk: dict[str, tuple[float, int]] = {}
+    if os.path.isdir(RESULTS_FOLDER):
+        with os.scandir(RESULTS_FOLDER) as it:
+            for entry in it:
+                if _is_results_filename(entry.name) or _is_results_filename(entry.name, True):
+                    stat = entry.stat()
+                    on_disk[entry.path] = (stat.st_mtime, stat.st_size)
+    on_disk.update((path, (mtime, 0)) for path, mtime in SnapshotStore.snapshot_paths().items())
+    changed = [path for path, stat in on_disk.items() if indexed.get(path) != stat]
+    with connection:
+        for path in indexed.keys() - on_disk.keys():
+            _remove_file(connection, path)
+        for path, entries in _parse_files(changed):
+            _remove_file(connection, path)
+            _add_file(connection, path, *on_disk[path], entries)
+        UuidTable.save()
+
+def _parse_files(paths: list[str]) -> Iterator[tuple[str, list[tuple]]]:
+    """Yields each path with what `_parse_file` returns for it, the files before the snapshots. Snapshots are
+       always read in this process, since they share subtrees that the store caches."""
+    filepaths = [path for path in paths if not SnapshotStore.is_snapshot_path(path)]
+    if (num_workers := min(os.cpu_count() or 1, len(filepaths) // MIN_FILES_PER_WORKER)) <= 1:
+        yield from zip(filepaths, map(_parse_file, filepaths))
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            chunksize = max(1, len(filepaths) // (num_workers * 8))
+            yield from zip(filepaths, executor.map(_parse_file, filepaths, chunksize=chunksize))
+    snapshot_paths = [path for path in paths if SnapshotStore.is_snapshot_path(path)]
+    yield from zip(snapshot_paths, map(_parse_file, snapshot_paths))
+
+def _parse_file(path: str) -> list[tuple]:
+    """Returns the entry for each dict in the file (see `_make_entry`). This runs in the pool's worker
+       processes, so it only returns what the main process needs to insert into the index."""
+    if Archive.is_archive(path):
+        return _archive_entries(Archive.read_columns(path))
+    report = SnapshotStore.read(path) if SnapshotStore.is_snapshot_path(path) else Files.read_json_textfile(path)
+    return [_make_entry(pos, depth, d) for pos, (depth, d) in enumerate(_traverse(report))]
+
+def _remove_file(connection: sqlite3.Connection, path: str) -> None:
+    connection.execute("DELETE FROM entries WHERE file_id IN (SELECT file_id FROM files WHERE path = ?)", (path,))
+    connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+def _add_file(connection: sqlite3.Connection, path: str, mtime: float, size: int, entries: list[tuple]) -> None:
+    """Inserts the file and its entries, giving persisted ids to the uuids in them (see UuidTable.py). Each
+       friends list is stored as an array of these ids, and an array of the times friended in epoch milliseconds."""
+    filename = os.path.basename(path)
+    file_id = connection.execute("INSERT INTO files (path, mtime, size, additional, multi) VALUES (?, ?, ?, ?, ?)",
+                                 (path, mtime, size, _is_results_filename(filename, True),
+                                  any(x in filename for x in (' plus ', ' minus ', ' intersect ')))).lastrowid
+    connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+        (file_id, pos, depth, UuidTable.to_id(uuid, persist=True), *values,
+         None if friend_uuids is None else
+         array('I', (UuidTable.to_id(friend_uuids[i:i+32], persist=True)
+                     for i in range(0, len(friend_uuids), 32))).tobytes(),
+         friend_times)
+        for pos, depth, uuid, *values, friend_uuids, friend_times in entries
+    ))
+
+def _traverse(d: dict, depth: int = 0) -> Iterator[tuple[int, dict]]:
+    """Yields d and all its nested friend dicts (in the same order as a preorder traversal), along with
+       how deeply nested each is."""
+    yield (depth, d)
+    for friend_dict in d.get('friends', []):
+        yield from _traverse(friend_dict, depth + 1)
+
+def _make_entry(pos: int, depth: int, d: dict) -> tuple:
+    """Returns the values for the dict's row in the entries table, except that the uuids are still strings
+       (the friends' uuids are joined into one string, to keep it compact) and the file's id isn't included."""
+    friends = d.get('friends', [])
+    assert all(len(f['uuid']) == 32 for f in friends)
+    return (pos, depth, d['uuid'], d.get('name'), d.get('fkdr'), d.get('star'), d.get('pit_rank'), len(d),
+            any(k in d for k in NON_TRIVIAL_KEYS), len(friends), len(friends) > 0 and 'time' in friends[0],
+            *((''.join(f['uuid'] for f in friends),
+               array('d', (Archive.time_in_ms(f.get('time')) for f in friends)).tobytes()) if 'friends' in d
+              else (None, None)))
+
+def _archive_entries(columns: Archive.Columns) -> list[tuple]:
+    """Like `_make_entry`, for every row of an archive. Each friends list is sliced straight from the
+       archive's uuid and time columns."""
+    entries = []
+    flags_column, first_friends, num_friends = (columns.flags.tolist(), columns.first_friend.tolist(),
+                                                columns.num_friends.tolist())
+    for row, (pos, depth, flags, (name, pit_rank, _)) in enumerate(zip(columns.pos.tolist(), columns.depth.tolist(),
+                                                                     flags_column, columns.strings)):
+        start, end = first_friends[row], first_friends[row] + num_friends[row]
+        entries.append((
+            pos, depth, columns.uuid[row*16:(row+1)*16].hex(), name,
+            columns.fkdr[row] if flags & Archive.FKDR else None, columns.star[row] if flags & Archive.STAR else None,
+            pit_rank, Archive.num_keys(flags), bool(flags & Archive.NON_TRIVIAL_FLAGS), end - start,
+            end > start and bool(flags_column[start] & Archive.TIME),
+            *((columns.uuid[start*16:end*16].hex(), columns.time[start:end].tobytes()) if flags & Archive.FRIENDS
+              else (None, None))
+        ))
+    return entries
+
+def _unpack_friends(friend_ids: bytes, friend_times: bytes) -> list[tuple[str, Optional[float]]]:
+    """Returns the (uuid, time friended in epoch milliseconds) pairs stored in an entry's friends arrays."""
+    ids, times = array('I'), array('d')
+    ids.frombytes(friend_ids)
+    times.frombytes(friend_times)
+    return [(uuid, None if math.isnan(time) else time) for uuid, time in zip(UuidTable.to_uuids(ids), times)]
+
+def _is_results_filename(f: str, for_additional_friends: bool = False) -> bool:
+    required_start = 'Additional friends of' if for_additional_friends else 'Friends of'
+    return f.startswith(required_start) and Files.is_friends_file(f)
+
+def results_files(json_only: bool = False) -> list[str]:
+    """Returns the paths of the files in the results folder (just the json ones, if `json_only` is True)."""
+    if not os.path.isdir(RESULTS_FOLDER):
+        return []
+    return [entry.path for entry in os.scandir(RESULTS_FOLDER) if (Files.is_json_file(entry.name) or not json_only) and
+            (_is_results_filename(entry.name) or _is_results_filename(entry.name, True))]
+
+def _included_entries_sql(additional_friends_files: bool) -> tuple[str, tuple]:
+    """Returns the sql condition (and its params) for the entries the cli args say to use, in either the
+       standard or additional friends files. If multiplayer files are included, their outermost dicts may
+       be left out."""
+    include_multi = args().include_multi_player_files()
+    skip_first = include_multi and args().skip_first_dict_in_multi_player_files()
+    return ("files.additional = ? AND (NOT files.multi OR (? AND (entries.depth > 0 OR NOT ?)))",
+            (additional_friends_files, include_multi, skip_first))
+
+def _select(columns: str, additional_friends_files: bool, condition: str = "1",
+            params: tuple = (), order_by: str = "") -> sqlite3.Cursor:
+    """Selects from the included entries. Unless `order_by` is given, they're ordered the way the results folder
+       is read: newest files first, and each file from its outermost dict inwards."""
+    included, included_params = _included_entries_sql(additional_friends_files)
+    return _get_connection().execute(
+        f"SELECT {columns} FROM entries JOIN files ON entries.file_id = files.file_id "
+        f"WHERE {included} AND ({condition}) "
+        f"ORDER BY {order_by + ', ' if order_by else ''}files.mtime DESC, files.path, entries.pos",
+        included_params + params
+    )
+
+def _get_uuid_id(uuid: str) -> Optional[int]:
+    """Returns the id of this uuid, or None if it isn't in the results folder (or anywhere else a uuid
+       was given an id)."""
+    _get_connection() # So that any uuids in new results files have been given ids.
+    return UuidTable.get_id(uuid)
+
+def name_uuid_pairs(additional_friends_files: bool) -> list[tuple[str, str]]:
+    """Returns the (name, uuid) pair of every entry with a name, in the order the results folder is read."""
+    rows = _select("entries.name, entries.uuid_id", additional_friends_files, "entries.name IS NOT NULL").fetchall()
+    return list(zip((row[0] for row in rows), UuidTable.to_uuids(row[1] for row in rows)))
+
+def _value_order(must_have_times_friended: bool) -> str:
+    """Returns the order that makes the most valuable entry for a uuid come first. This is the one with
+       the biggest friends list, then the one that records times friended, then the one with the most keys
+       (with the first two criteria swapped if `must_have_times_friended` is True)."""
+    criteria = ["entries.num_friends DESC", "entries.friends_have_times DESC"]
+    if must_have_times_friended:
+        criteria.reverse()
+    return ', '.join(criteria + ["entries.num_keys DESC"])
+
+def best_friends_list(uuid: str,
+                      must_have_times_friended: bool = False) -> Optional[list[tuple[str, Optional[float]]]]:
+    """Returns the friends list (as (uuid, time) pairs) of the most valuable entry for this uuid in the standard
+       files, or None if it has no non-trivial entry."""
+    if (uuid_id := _get_uuid_id(uuid)) is None:
+        return None
+    row = _select("entries.friend_ids, entries.friend_times", False, "entries.uuid_id = ? AND entries.non_trivial",
+                  (uuid_id,), _value_order(must_have_times_friended)).fetchone()
+    return None if row is None else _unpack_friends(row[0] or b'', row[1] or b'')
+
+def best_entries() -> list[dict]:
+    """Returns the most valuable non-trivial entry for each uuid in the standard files. Each has the uuid and
+       whichever of the non-trivial keys the entry has (with `friends` being the number of friends)."""
+    best: dict[str, dict] = {}
+    for row in _select("entries.uuid_id, entries.num_friends, entries.friend_ids IS NOT NULL, entries.name, "
+                       "entries.fkdr, entries.star, entries.pit_rank", False, "entries.non_trivial",
+                       order_by="entries.uuid_id, " + _value_order(False)):
+        if (uuid := UuidTable.to_uuid(row[0])) not in best:
+            entry = {'uuid': uuid, 'friends': row[1]} if row[2] else {'uuid': uuid}
+            entry.update((k, v) for k, v in zip(NON_TRIVIAL_KEYS[1:], row[3:]) if v is not None)
+            best[uuid] = entry
+    return [best[uuid] for uuid in sorted(best)]
+
+def friends_lists(uuid: str, additional_friends_files: bool) -> list[list[tuple[str, Optional[float]]]]:
+    """Returns the friends lists of all the entries for this uuid, in the order the results folder is read."""
+    if (uuid_id := _get_uuid_id(uuid)) is None:
+        return []
+    return [_unpack_friends(*row) for row in _select("entries.friend_ids, entries.friend_times", additional_friends_files,
+                                                     "entries.uuid_id = ? AND entries.friend_ids IS NOT NULL",
+                                                     (uuid_id,))]
+
+def friend_id_lists() -> Iterator[tuple[int, array]]:
+    """Yields the uuid id and friends' ids of every included entry with a friends list, in both the standard
+       and additional friends files."""
+    for additional_friends_files in (False, True):
+        for uuid_id, friend_ids in _select("entries.uuid_id, entries.friend_ids", additional_friends_files,
+                                           "entries.friend_ids IS NOT NULL"):
+            ids = array('I')
+            ids.frombytes(friend_ids)
+            yield (uuid_id, ids)
+
+def num_unique_uuids() -> int:
+    """Returns the number of uuids recorded anywhere in the included files."""
+    included_standard, params_standard = _included_entries_sql(False)
+    included_additional, params_additional = _included_entries_sql(True)
+    return _get_connection().execute(
+        f"SELECT COUNT(DISTINCT entries.uuid_id) FROM entries JOIN files ON entries.file_id = files.file_id "
+        f"WHERE ({included_standard}) OR ({included_additional})", params_standard + params_additional
+    ).fetchone()[0]
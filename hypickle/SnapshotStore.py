@@ -0,0 +1,217 @@
+"""Contains the snapshot store, which results files can be moved into so that repeated snapshots of the same
+   friends lists don't take up space for what they have in common."""
+
+from __future__ import annotations
+import os
+import json
+import hashlib
+import sqlite3
+import struct
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Optional, Iterable
+
+from . import Archive
+from . import Files
+
+STORE_FILENAME = "snapshots.db"
+HASH_SIZE = 16
+MAX_CHAIN_LENGTH = 8
+"""How many deltas deep a node's friends can be stored (see `_write_node`), before its full list is stored again."""
+MAX_CACHED_DICTS = 200000
+_COPY = struct.Struct('<cII')
+_INSERT = struct.Struct('<cI')
+
+_connection: Optional[sqlite3.Connection] = None
+_friends_cache: dict[bytes, list[bytes]] = {}
+_dicts_cache: OrderedDict[bytes, dict] = OrderedDict() # The most recently used last.
+
+def _get_connection() -> sqlite3.Connection:
+    """Returns the connection to the store. Each dict of a report is a node, and each snapshot is the name and
+       mtime of the results file it was, and the hash of its root node."""
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(STORE_FILENAME)
+        _connection.executescript("""
+            CREATE TABLE IF NOT EXISTS nodes (
+                hash BLOB UNIQUE, uuid TEXT, fields TEXT, has_friends INTEGER, base BLOB, friends BLOB,
+                chain_length INTEGER);
+            CREATE INDEX IF NOT EXISTS uuid_index ON nodes (uuid);
+            CREATE TABLE IF NOT EXISTS snapshots (name TEXT PRIMARY KEY, mtime REAL, root BLOB);
+        """)
+    return _connection
+
+def close() -> None:
+    """Closes the connection to the store, and clears what's been cached from it."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+    _friends_cache.clear()
+    _dicts_cache.clear()
+
+def is_snapshot_path(path: str) -> bool:
+    return os.path.dirname(path) == STORE_FILENAME
+
+def snapshot_paths() -> dict[str, float]:
+    """Returns the path (the store's filename joined with the snapshot's name) and mtime of each snapshot, or an
+       empty dict if there's no store."""
+    if _connection is None and not os.path.isfile(STORE_FILENAME):
+        return {}
+    return {os.path.join(STORE_FILENAME, name): mtime
+            for name, mtime in _get_connection().execute("SELECT name, mtime FROM snapshots")}
+
+def read(path: str) -> dict:
+    """Returns the report in this snapshot (as the results index reads it, like a file in the results folder).
+       Dicts for identical subtrees are shared (between snapshots too), so the report shouldn't be modified."""
+    assert is_snapshot_path(path)
+    row = _get_connection().execute("SELECT root FROM snapshots WHERE name = ?", (os.path.basename(path),)).fetchone()
+    assert row, f"There's no snapshot {path}"
+    return _read_node(row[0])
+
+def _cache_dict(node_hash: bytes, d: dict) -> None:
+    _dicts_cache[node_hash] = d
+    if len(_dicts_cache) > MAX_CACHED_DICTS:
+        _dicts_cache.popitem(last=False)
+
+def _read_node(node_hash: bytes) -> dict:
+    if (d := _dicts_cache.get(node_hash)) is not None:
+        _dicts_cache.move_to_end(node_hash)
+    else:
+        fields, has_friends = _get_connection().execute("SELECT fields, has_friends FROM nodes WHERE hash = ?",
+                                                        (node_hash,)).fetchone()
+        d = json.loads(fields)
+        if has_friends:
+            friends = _friends(node_hash)
+            _read_leaf_nodes([friend_hash for friend_hash in friends if friend_hash not in _dicts_cache])
+            d['friends'] = [_read_node(friend_hash) for friend_hash in friends]
+        _cache_dict(node_hash, d)
+    return d
+
+def _read_leaf_nodes(node_hashes: list[bytes]) -> None:
+    """Reads the nodes without friends among these into the cache, a batch per query."""
+    for i in range(0, len(node_hashes), 500):
+        batch = node_hashes[i:i+500]
+        for node_hash, fields in _get_connection().execute(
+            f"SELECT hash, fields FROM nodes WHERE NOT has_friends AND hash IN ({', '.join('?' * len(batch))})", batch
+        ):
+            _cache_dict(node_hash, json.loads(fields))
+
+def _friends(node_hash: bytes) -> list[bytes]:
+    """Returns the hashes of the node's friends, applying its delta to its base's friends if it has one."""
+    if (friends := _friends_cache.get(node_hash)) is None:
+        base, data = _get_connection().execute("SELECT base, friends FROM nodes WHERE hash = ?",
+                                               (node_hash,)).fetchone()
+        if base is None:
+            friends = [data[i:i+HASH_SIZE] for i in range(0, len(data), HASH_SIZE)]
+        else:
+            friends, base_friends, i = [], _friends(base), 0
+            while i < len(data):
+                if data[i:i+1] == b'C':
+                    _, start, end = _COPY.unpack_from(data, i)
+                    friends.extend(base_friends[start:end])
+                    i += _COPY.size
+                else:
+                    _, num_inserted = _INSERT.unpack_from(data, i)
+                    i += _INSERT.size
+                    friends.extend(data[j:j+HASH_SIZE] for j in range(i, i + num_inserted*HASH_SIZE, HASH_SIZE))
+                    i += num_inserted*HASH_SIZE
+        _friends_cache[node_hash] = friends
+    return friends
+
+def _write_node(d: dict) -> bytes:
+    """Stores the dict and its friends (if they aren't stored already), and returns its hash. The hash covers its
+       content including its friends' hashes, so identical subtrees are only stored once. Its friends are stored
+       as a delta from the friends of the last stored node for the same uuid (see `_delta`), unless that's
+       already `MAX_CHAIN_LENGTH` deltas deep or the delta wouldn't save much."""
+    friends = [_write_node(friend_dict) for friend_dict in d.get('friends', [])]
+    fields = json.dumps({k: v for k, v in d.items() if k != 'friends'})
+    node_hash = hashlib.blake2b(fields.encode() + (b'\0' + b''.join(friends) if 'friends' in d else b''),
+                                digest_size=HASH_SIZE).digest()
+    connection = _get_connection()
+    if connection.execute("SELECT 1 FROM nodes WHERE hash = ?", (node_hash,)).fetchone():
+        return node_hash
+    base, data, chain_length = None, b''.join(friends), 0
+    row = connection.execute("SELECT hash, chain_length FROM nodes WHERE uuid = ? AND has_friends "
+                             "ORDER BY rowid DESC LIMIT 1", (d['uuid'],)).fetchone()
+    if friends and row and row[1] < MAX_CHAIN_LENGTH:
+        delta = _delta(_friends(row[0]), friends)
+        if len(delta) < len(data) // 2:
+            base, data, chain_length = row[0], delta, row[1] + 1
+    connection.execute("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (node_hash, d['uuid'], fields, 'friends' in d, base, data, chain_length))
+    _friends_cache[node_hash] = friends
+    return node_hash
+
+def _delta(base_friends: list[bytes], friends: list[bytes]) -> bytes:
+    """Returns the ops that make `friends` out of `base_friends`: copying a range of them, or inserting hashes."""
+    ops = []
+    for tag, base_start, base_end, start, end in SequenceMatcher(None, base_friends, friends,
+                                                                  autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append(_COPY.pack(b'C', base_start, base_end))
+        elif tag in ('replace', 'insert'):
+            ops.append(_INSERT.pack(b'I', end - start) + b''.join(friends[start:end]))
+    return b''.join(ops)
+
+def store_files(filepaths: Iterable[str]) -> None:
+    """Moves these results files (json or archives) into the store, oldest first so that each snapshot's
+       deltas are from earlier ones. A file is only deleted once its snapshot is checked to have the same
+       report, and a snapshot already stored with the same name (from a run stopped before deleting the file)
+       is replaced."""
+    filepaths = sorted(filepaths, key=os.path.getmtime)
+    num_moved, moved_size = 0, 0
+    connection = _get_connection()
+    for filepath in filepaths:
+        report, size = Archive.read_results_file(filepath), os.path.getsize(filepath)
+        with connection: # The snapshot and its new nodes are only committed if the check below passes.
+            connection.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", (
+                name := os.path.basename(filepath), os.path.getmtime(filepath), _write_node(report)))
+            _dicts_cache.clear() # So that the check reads the snapshot back from the store.
+            _friends_cache.clear()
+            if not (matches := read(os.path.join(STORE_FILENAME, name)) == report):
+                connection.rollback()
+        if not matches:
+            _dicts_cache.clear() # Since they may have nodes that were rolled back.
+            _friends_cache.clear()
+            print(f"Leaving {filepath} in the results folder, since its snapshot didn't have the same report")
+            continue
+        os.remove(filepath)
+        num_moved, moved_size = num_moved + 1, moved_size + size
+    connection.execute("VACUUM")
+    print(f"Moved {num_moved} files ({moved_size} bytes) into the store, which is now "
+          f"{os.path.getsize(STORE_FILENAME)} bytes.")
+
+def export_snapshots(folder_name: str = "results") -> None:
+    """Moves every snapshot in the store back out to a results file with its name (json or an archive, as it was
+       before it was stored) and mtime. A snapshot is only deleted once its file is checked to have the same
+       report, and if a file with its name already has the same report, the snapshot is just deleted."""
+    connection = _get_connection()
+    snapshots = connection.execute("SELECT name, mtime FROM snapshots ORDER BY name").fetchall()
+    os.makedirs(folder_name, exist_ok=True)
+    num_exported = 0
+    for name, mtime in snapshots:
+        report, filepath = read(os.path.join(STORE_FILENAME, name)), os.path.join(folder_name, name)
+        if not os.path.exists(filepath):
+            temp_path = os.path.join(folder_name, 'tmp ' + name) # Keeps the extension, for `Files.open_text`.
+            if Archive.is_archive(filepath):
+                with open(temp_path, 'wb') as f:
+                    f.write(Archive.to_bytes(report))
+            else:
+                with Files.open_text(temp_path, write=True) as text_file:
+                    json.dump(report, text_file, indent=4)
+            os.utime(temp_path, (mtime, mtime))
+            os.replace(temp_path, filepath)
+        if Archive.read_results_file(filepath) != report:
+            print(f"Leaving {name} in the store, since {filepath} doesn't have the same report")
+            continue
+        with connection:
+            connection.execute("DELETE FROM snapshots WHERE name = ?", (name,))
+        num_exported += 1
+    if not connection.execute("SELECT 1 FROM snapshots").fetchone():
+        with connection:
+            connection.execute("DELETE FROM nodes")
+        _dicts_cache.clear()
+        _friends_cache.clear()
+    connection.execute("VACUUM")
+    print(f"Moved {num_exported} snapshots out of the store into {folder_name}.")
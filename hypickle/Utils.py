@@ -5,10 +5,8 @@ from datetime import datetime
 from time import sleep, mktime
 from typing import Optional, Iterable, Any, Type
 from collections import OrderedDict
-from copy import deepcopy
 import math
 from pprint import pprint
-import itertools
 import pyttsx3 # type: ignore
 talker: Optional[pyttsx3.Engine | Any] = None
 
@@ -17,7 +15,7 @@ def list_subtract(main_list: list, subtract_elems: Iterable) -> list:
     return [x for x in main_list if x not in subtract_set]
 
 def remove_duplicates(lst: list) -> list:
-    return list(OrderedDict.fromkeys(deepcopy(lst))) # regular dict works to maintain order for python >= 3.7
+    return list(OrderedDict.fromkeys(lst)) # regular dict works to maintain order for python >= 3.7
 
 def is_date_string(text: str) -> bool:
     try:
@@ -53,19 +51,17 @@ def date_to_epoch(date_string: str, in_seconds: bool) -> float:
 def epoch_to_date(epoch: float, epoch_in_seconds: bool) -> str:
     return datetime.fromtimestamp(epoch / 1000 if not epoch_in_seconds else epoch).strftime('%Y-%m-%d')
 
-def find_dict_for_given_player(d: dict, uuid_or_ign: str, make_deep_copy: bool = True,
-                               dict_must_have_friends_list: bool = True) -> dict | None:
+def find_dict_for_given_player(d: dict, uuid_or_ign: str, dict_must_have_friends_list: bool = True) -> dict | None:
     """ d will be a dictionary read from a file in json format - it will have a uuid key, and possibly
     a name, fkdr, and friends key. The friends key would have a value that is a list of dictionaries,
-    recursively following the same dictionary requirements."""
-    if make_deep_copy:
-        d = deepcopy(d)
+    recursively following the same dictionary requirements. Note that the dict returned is part of d,
+    rather than a copy."""
     if ((is_uuid(uuid_or_ign) and d['uuid'] == uuid_or_ign) or
         (is_ign(uuid_or_ign) and 'name' in d and d['name'].lower() == uuid_or_ign.lower())):
         if 'friends' in d or not dict_must_have_friends_list:
             return d
     for friend_dict in d.get('friends', []):
-        if result := find_dict_for_given_player(friend_dict, uuid_or_ign, make_deep_copy=False,
+        if result := find_dict_for_given_player(friend_dict, uuid_or_ign,
                                                 dict_must_have_friends_list=dict_must_have_friends_list):
             return result
     return None
@@ -84,91 +80,16 @@ def is_ign(uuid_or_ign: str) -> bool:
        Precondition: uuid_or_ign must be either a uuid or ign."""
     return not is_uuid(uuid_or_ign)
 
-def get_all_ign_uuid_pairs_in_dict(d: dict, make_deepcopy: bool = False,
-                                   get_uuid_ign_pairs_instead: bool = False) -> dict:
-    """Traverses the d param and returns a dict, where each key-value pair represents an ign-uuid
-    pair found in d (unless `get_uuid_ign_pairs_instead` is True, in which case uuid-ign pairs are built)."""
-    if make_deepcopy:
-        d = deepcopy(d)
-    ign_uuid_pairs = {}
-    if 'name' in d:
-        name_lower = d['name'].lower()
-        if get_uuid_ign_pairs_instead:
-            ign_uuid_pairs[d['uuid']] = name_lower
-        else:
-            ign_uuid_pairs[name_lower] = d['uuid']
-    for friend_dict in d.get('friends', []):
-        ign_uuid_pairs.update(get_all_ign_uuid_pairs_in_dict(friend_dict, False, get_uuid_ign_pairs_instead))
-    return ign_uuid_pairs
-
-def get_all_nested_dicts_in_dict(d: dict, make_deepcopy: bool = False) -> list[dict]:
-    """Traverses through d and returns a list of d and all its nested friend dicts."""
-    if make_deepcopy:
-        d = deepcopy(d)
-    dicts = [d] if 'exclude' not in d else []
-    for friend_dict in d.get('friends', []):
-        friend_dict['filename'] = d['filename']
-        dicts.extend(get_all_nested_dicts_in_dict(friend_dict, make_deepcopy=False))
-    return dicts
-
 def print_info_for_key(dicts: list[dict], k: str, indent: str) -> None:
+    """For the 'friends' key, each dict should store the number of friends rather than the list itself."""
     k_for_print = k + ('s' if k == 'star' else '')
     print(f"{indent}{len(dicts)} players with their {k_for_print} recorded in results.")
     if k in ('star', 'fkdr', 'friends'):
-        highest_dict = max(dicts, key=lambda d: len(d[k]) if k == 'friends' else d[k])
-        highest_stat = len(highest_dict[k]) if k == 'friends' else highest_dict[k]
+        highest_dict = max(dicts, key=lambda d: d[k])
+        highest_stat = highest_dict[k]
         name = f"{highest_dict['name']}, " if 'name' in highest_dict else ''
         print(f"{indent*2}Most {k_for_print}: {highest_stat} ({name}uuid {highest_dict['uuid']})")
 
-def does_first_have_more_friends(first: list, second: list) -> bool | None:
-    """True returned if more, False returned if less, None returned if equal."""
-    return True if len(first) > len(second) else (False if len(second) > len(first) else None)
-
-def does_first_record_times_better(first: list, second: list) -> bool | None:
-    """True returned if better, False returned if worse, None returned if equal."""
-    first_has_times = len(first) > 0 and 'time' in first[0]
-    second_has_times = len(second) > 0 and 'time' in second[0]
-    return None if (first_has_times == second_has_times) else first_has_times
-
-def does_first_have_more_keys(first: dict, second: dict) -> bool | None:
-    """True returned if more, False returned if less, None returned if equal."""
-    return None if len(first.keys()) == len(second.keys()) else len(first.keys()) > len(second.keys())
-
-def is_first_dict_more_valuable(first: dict, second: dict, must_have_times_friended: bool) -> bool:
-    """Returns true if the second dict should be replaced with the first dict, based off
-       some criteria. This function is called by the 'remove_dicts_duplicate_uuids' function."""
-    assert first['uuid'] == second['uuid']
-    first_friends, second_friends = first.get('friends', []), second.get('friends', [])
-
-    comparisons: list[bool | None] = [
-        does_first_have_more_friends(first_friends, second_friends),
-        does_first_record_times_better(first_friends, second_friends),
-        does_first_have_more_keys(first, second)
-    ]
-    if must_have_times_friended:
-        comparisons[0], comparisons[1] = comparisons[1], comparisons[0]
-
-    return next((b for b in comparisons if b is not None), False)
-
-def remove_dicts_duplicate_uuids(dicts: list[dict], make_deepcopy: bool = False,
-                                 must_have_times_friended: bool = False) -> list[dict]:
-    """ For dicts with the same uuid, only one dict will be kept in the new list. The criteria
-        for choosing which one are as follows (in order):
-        - bigger friends list
-        - records time added for friends
-        - more keys in dict
-        - The dict that came first in the `dicts` param
-        Note that 1) and 2) are swapped, if the `must_have_times_friended` param is set to True. """
-    if make_deepcopy:
-        dicts = deepcopy(dicts)
-    dicts_unique_uuids: dict = {} # Key uuid, value a dict (one of the elements in dicts).
-    for d in dicts:
-        uuid = d['uuid']
-        if (uuid not in dicts_unique_uuids or is_first_dict_more_valuable(d, dicts_unique_uuids[uuid],
-        must_have_times_friended)):
-            dicts_unique_uuids[uuid] = d
-    return list(dicts_unique_uuids.values())
-
 def is_in_milliseconds(epoch_val: float | int) -> bool:
     """epoch_val is assumed to be in either seconds or milliseconds"""
     return epoch_val > 10_000_000_000
@@ -186,20 +107,9 @@ def convert_to_seconds(time_val: float | int | str | None) -> float:
     else:
         return time_val
 
-def is_older(time_one: str | float | int | None, time_two: str | float | int | None) -> bool:
-    """Returns true if time_one is more recent than time_two. time_one and time_two must each be either
-       a datestring or epoch (in seconds/milliseconds)."""
-    return convert_to_seconds(time_one) < convert_to_seconds(time_two)
-
 def get_current_date() -> str:
     return datetime.now().strftime('%Y-%m-%d')
 
-def replace_in_list(lst: list[str], elem_to_remove: str, list_to_insert: list[str]) -> list[str]:
-    """Returns a new list, where any occurrences of `elem_to_remove` (case-insensitive) in `lst` are
-       replaced with the elements in `list_to_insert`. `lst` will not be modified."""
-    elem_to_remove = elem_to_remove.lower()
-    return list(itertools.chain(*(list_to_insert if s.lower() == elem_to_remove else [s] for s in lst)))
-
 def contains_whitespace(s: str) -> bool:
     return s != remove_whitespace(s)
 
@@ -272,11 +182,6 @@ def print_diff_dicts(old_dict: dict, new_dict: dict, prepended_msg: str = '') ->
     print(prepended_msg, end='')
     pprint(DeepDiff(old_dict, new_dict), indent=2)
 
-def content_in_file(filename: str) -> bool:
-    """Returns True if there is at least one non-whitespace character in the file."""
-    with open(filename, 'r') as f:
-        return f.read().strip() != ''
-
 def speak(text: str) -> None:
     """Uses pyttsx3 to do text to speech."""
     global talker
@@ -0,0 +1,122 @@
+"""Contains the table that interns uuids, giving each a dense int id. The ids the results index uses are saved
+   (so they refer to the same uuids across runs), while the rest only last for the run."""
+
+from __future__ import annotations
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Iterable, Iterator
+
+TABLE_FILENAME = "uuid_table.bin"
+"""Stored in the same folder as the results index, as 16 byte records (each uuid in binary form, with its id
+   being the record's position). Records are only ever appended."""
+LOCK_FILENAME = TABLE_FILENAME + ".lock"
+LOCK_TIMEOUT_SECS = 10
+RECORD_SIZE = 16
+
+_uuids: list[str] = []
+_ids: Optional[dict[str, int]] = None
+_num_saved = 0
+_num_to_save = 0 # One more than the biggest id that has to be saved.
+
+def _load() -> dict[str, int]:
+    global _ids, _num_saved, _num_to_save
+    if _ids is None:
+        data = b''
+        if os.path.isfile(TABLE_FILENAME):
+            with open(TABLE_FILENAME, 'rb') as f:
+                data = f.read()
+        _num_saved = _num_to_save = len(data) // RECORD_SIZE # A partly written record at the end is ignored.
+        _uuids.extend(from_bytes(data[i:i+RECORD_SIZE]) for i in range(0, _num_saved * RECORD_SIZE, RECORD_SIZE))
+        _ids = {uuid: i for i, uuid in enumerate(_uuids)}
+    return _ids
+
+def reset() -> None:
+    """Forgets the table, so that it's loaded again the next time it's used. Any ids given this run that
+       haven't been saved are lost."""
+    global _ids, _num_saved, _num_to_save
+    _uuids.clear()
+    _ids, _num_saved, _num_to_save = None, 0, 0
+
+def to_id(uuid: str, persist: bool = False) -> int:
+    """Returns the id for this uuid, giving it the next id if it doesn't have one yet. If `persist` is True,
+       the id is saved by the next `save()`, along with any unsaved ids before it. That's rarely any others, since
+       the results index gives out its ids the first time it's queried, which is before the friends lists from
+       its results (or the API) are given ids."""
+    global _num_to_save
+    ids = _load()
+    if (uuid_id := ids.get(uuid)) is None:
+        assert to_bytes(uuid).hex() == uuid, f"Can't intern '{uuid}', since it isn't a 32 char lowercase hex uuid"
+        uuid_id = ids[uuid] = len(_uuids)
+        _uuids.append(uuid)
+    if persist:
+        _num_to_save = max(_num_to_save, uuid_id + 1)
+    return uuid_id
+
+def get_id(uuid: str) -> Optional[int]:
+    """Returns the id for this uuid, or None if it doesn't have one."""
+    return _load().get(uuid)
+
+def to_uuid(uuid_id: int) -> str:
+    _load()
+    return _uuids[uuid_id]
+
+def to_uuids(uuid_ids: Iterable[int]) -> list[str]:
+    """Like `to_uuid`, for many ids at once."""
+    _load()
+    return [_uuids[uuid_id] for uuid_id in uuid_ids]
+
+def size() -> int:
+    """Returns the number of uuids with an id (i.e., one more than the biggest id)."""
+    return len(_load())
+
+def to_bytes(uuid: str) -> bytes:
+    """Returns the 16 byte binary form of the uuid."""
+    assert len(uuid) == 32
+    return bytes.fromhex(uuid)
+
+def from_bytes(b: bytes) -> str:
+    return b.hex()
+
+@contextmanager
+def _locked() -> Iterator[None]:
+    """Holds the lock file while in the with block, so that only one run appends to the table file at a time."""
+    deadline = time.monotonic() + LOCK_TIMEOUT_SECS
+    while True:
+        try:
+            fd = os.open(LOCK_FILENAME, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Timed out waiting for {LOCK_FILENAME}. If no other run is going, delete it.")
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(LOCK_FILENAME)
+
+def save() -> None:
+    """Appends the uuids given persisted ids this run to the table file. Any records another run appended since
+       the table was loaded are kept, and must be for the same uuids that have those ids in this run."""
+    global _num_saved, _num_to_save
+    if _ids is None or _num_saved == _num_to_save:
+        return
+    with _locked(), open(TABLE_FILENAME, 'a+b') as f:
+        if f.seek(0, os.SEEK_END) < _num_saved * RECORD_SIZE:
+            raise RuntimeError(f"{TABLE_FILENAME} was truncated or replaced during this run.")
+        f.seek(_num_saved * RECORD_SIZE)
+        data = f.read()
+        num_on_disk = _num_saved + len(data) // RECORD_SIZE
+        appended = [from_bytes(data[i:i+RECORD_SIZE]) for i in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE)]
+        num_shared = min(num_on_disk, len(_uuids)) - _num_saved
+        if appended[:num_shared] != _uuids[_num_saved:_num_saved+num_shared]:
+            raise RuntimeError(f"Another run gave other uuids the same ids in {TABLE_FILENAME}, so the ids given "
+                               "in this run can't be saved. Try running again.")
+        f.truncate(num_on_disk * RECORD_SIZE) # Drops a partly written record, from a run that was interrupted.
+        f.write(b''.join(to_bytes(uuid) for uuid in _uuids[num_on_disk:_num_to_save]))
+    for uuid in appended[num_shared:]:
+        _ids[uuid] = len(_uuids)
+        _uuids.append(uuid)
+    _num_saved = _num_to_save = max(num_on_disk, _num_to_save)
@@ -4,20 +4,58 @@
 from __future__ import annotations
 from time import time, sleep
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Mapping, Any, Type
 import re
 import os.path
+import threading
+import json
+import hashlib
+from concurrent.futures import Future
 import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
 
 from .MyClasses import UUID_Plus_Time, args
 from . import Files
 from . import Utils
 from . import leveling
 from .Rank import Rank
+from .RateLimiter import RateLimiter
+from . import ResponseCache
+from . import JsonDecoding
 
 TIME_STARTED: float = time()
 num_api_calls_made: int = 0
-_api_key: str | None = None
+API_KEY_FILENAME = 'api-key.txt'
+_api_keys: Optional[list[str]] = None
+"""The valid keys in `api-key.txt` that are still in rotation."""
+_api_keys_lock = threading.Lock()
+_rate_limiters: dict[str, RateLimiter] = {}
+"""Each api key has its own rate limit, so gets its own limiter."""
+
+POOL_SIZE = 10
+"""Max number of keep-alive connections held open to the api at once."""
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+_session: Optional[requests.Session] = None
+_adapter: Optional[HTTPAdapter] = None
+
+MAX_CONCURRENT_REQUESTS = 8
+"""Max number of threads that callers should have calling `getJSON` at once."""
+_api_calls_lock = threading.Lock()
+
+SHARE_RESULTS_SECS = 10
+"""For this long after a response is received, it's shared with identical requests."""
+num_api_calls_saved: int = 0
+_in_flight: dict[tuple[str, str, Optional[tuple]], tuple[Future, bool]] = {}
+"""Key is (typeOfRequest, uuid_or_ign, fields), value is the future of the in flight call and whether it may use
+   the cache."""
+_recent_results: dict[tuple[str, str, Optional[tuple]], tuple[float, dict]] = {}
+"""Key is (typeOfRequest, uuid_or_ign, fields), value is the time the result was received and the result itself.
+   Ordered by the time received."""
+CONTENT_HASH_KEY = '_content_hash'
+"""When `getJSON` is called with `fields` for a player whose online status isn't shown, the result has the
+   `content_hash` of the whole player object under this key."""
+_single_flight_lock = threading.Lock()
 
 def make_request_url(typeOfRequest: str, uuid_or_ign: str | None) -> str:
     assert (typeOfRequest == 'leaderboards') == (uuid_or_ign is None)
@@ -28,72 +66,195 @@ def make_request_url(typeOfRequest: str, uuid_or_ign: str | None) -> str:
         requestURL += f"?{query_param_name}={uuid_or_ign}"
     return requestURL
 
-sleep_till: Optional[datetime] = None
-def getJSON(typeOfRequest: str, uuid_or_ign: Optional[str], specific_api_key: Optional[str] = None) -> dict:
-    """ This function is used for getting a JSON from Hypixel's Public API. """
-    global sleep_till, num_api_calls_made
+def _get_session() -> requests.Session:
+    """Returns the module's session, which keeps its connections to the api alive between requests (so
+       each request after the first doesn't need to do a new TCP + TLS handshake)."""
+    global _session, _adapter
+    if _session is None:
+        _session = requests.Session()
+        _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        _session.mount('https://', _adapter)
+    return _session
+
+def connection_stats() -> tuple[int, int]:
+    """Returns the number of connections opened to the api so far, and the number of requests
+       that reused an already open connection."""
+    if _adapter is None:
+        return (0, 0)
+    pools = _adapter.poolmanager.pools
+    opened = sum(pools[k].num_connections for k in pools.keys())
+    num_requests = sum(pools[k].num_requests for k in pools.keys())
+    return (opened, num_requests - opened)
+
+def getJSON(typeOfRequest: str, uuid_or_ign: Optional[str], specific_api_key: Optional[str] = None,
+            use_cache: bool = True, fields: Optional[tuple[tuple[str, ...], ...]] = None) -> dict:
+    """ This function is used for getting a JSON from Hypixel's Public API.
+        If `use_cache` is True, a recent enough response in the on-disk cache may be returned instead.
+        Either way, any response that's received will be written to the cache.
+        If `fields` is given, only the values at those key paths (relative to the result) are decoded, and
+        the result may also get a hash of the whole result under CONTENT_HASH_KEY (since the rest of it
+        isn't available to compare against later responses).
+        Identical requests made at the same time (or within SHARE_RESULTS_SECS of each other, if `use_cache`
+        is True) share a single call and its result - so the dict returned shouldn't be modified. """
+    global num_api_calls_saved
+    if uuid_or_ign is None or specific_api_key is not None:
+        return _fetchJSON(typeOfRequest, uuid_or_ign, specific_api_key, use_cache, fields)
+
+    key = (typeOfRequest, uuid_or_ign.lower(), fields)
+    with _single_flight_lock:
+        if use_cache and key in _recent_results and time() - _recent_results[key][0] <= SHARE_RESULTS_SECS:
+            num_api_calls_saved += 1
+            return _recent_results[key][1]
+        if in_flight := _in_flight.get(key):
+            # If the in flight call may return a cached response, it's only shared with callers that allow that.
+            can_share = use_cache or not in_flight[1]
+            num_api_calls_saved += can_share
+        else:
+            future: Future = Future()
+            _in_flight[key] = (future, use_cache)
+    if in_flight:
+        return (in_flight[0].result() if can_share
+                else _fetchJSON(typeOfRequest, uuid_or_ign, specific_api_key, use_cache, fields))
 
-    if sleep_till and (sleep_duration := (sleep_till - datetime.now()).total_seconds()) >= 0:
-        if not args().comma_sep_list():
+    try:
+        result = _fetchJSON(typeOfRequest, uuid_or_ign, specific_api_key, use_cache, fields)
+    except Exception as e:
+        with _single_flight_lock:
+            del _in_flight[key]
+        future.set_exception(e)
+        raise
+    with _single_flight_lock:
+        del _in_flight[key]
+        _recent_results.pop(key, None)
+        _recent_results[key] = (time(), result)
+        while _recent_results and time() - next(iter(_recent_results.values()))[0] > SHARE_RESULTS_SECS:
+            del _recent_results[next(iter(_recent_results))]
+    future.set_result(result)
+    return result
+
+def _fetchJSON(typeOfRequest: str, uuid_or_ign: Optional[str], specific_api_key: Optional[str],
+               use_cache: bool, fields: Optional[tuple[tuple[str, ...], ...]]) -> dict:
+    global num_api_calls_made
+
+    cache_uuid = (uuid_or_ign if ResponseCache.is_cacheable(typeOfRequest, uuid_or_ign)
+                  and args().use_response_cache() else None)
+    if (cache_uuid and use_cache and not args().refresh_response_cache() and
+        (cached_body := ResponseCache.get(typeOfRequest, cache_uuid)) is not None):
+        return _decode_result(typeOfRequest, cached_body, fields)
+
+    api_key = specific_api_key if specific_api_key is not None else _choose_api_key()
+    rate_limiter = _rate_limiters.setdefault(api_key, RateLimiter())
+    if (wait := rate_limiter.reserve()) > 0:
+        if wait >= 5 and not args().comma_sep_list():
+            sleep_till = datetime.now() + timedelta(seconds=wait)
             print(f"Sleeping until {sleep_till.strftime('%I:%M:%S %p')} for rate limiting.")
-        sleep(sleep_duration)
-    sleep_till = None
-
-    num_api_calls_made += 1
-    if args().debug_api():
-        print(f"{num_api_calls_made}\n{time() - TIME_STARTED}\n\n")
-
-    response = requests.get(
-        make_request_url(typeOfRequest, uuid_or_ign), verify=args().verify_requests(),
-        headers={"API-Key": _get_api_key() if specific_api_key is None else specific_api_key}
-    )
+        sleep(wait)
+
+    with _api_calls_lock:
+        num_api_calls_made += 1
+        if args().debug_api():
+            opened, reused = connection_stats()
+            print(f"{num_api_calls_made}\n{time() - TIME_STARTED}\n"
+                  f"{opened} connections opened, {reused} reused, {num_api_calls_saved} calls saved\n"
+                  f"rate limit budget {rate_limiter.budget()} for key ...{api_key[-4:]}, projected wait "
+                  f"{round(rate_limiter.projected_wait(), 2)}s\n\n")
+
+    responseHeaders: Mapping[str, str] = {}
+    try:
+        response = _get_session().get(
+            make_request_url(typeOfRequest, uuid_or_ign), verify=args().verify_requests(),
+            headers={"API-Key": api_key}, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        responseHeaders = response.headers
+    finally:
+        rate_limiter.update(responseHeaders)
+    paths = None if fields is None else (('success',),) + tuple((typeOfRequest,) + f for f in fields)
     try:
-        responseHeaders, responseJSON = response.headers, response.json()
+        responseJSON = (JsonDecoding.decode(response.content) if paths is None
+                        else JsonDecoding.decode_paths(response.content, paths))
     except Exception as e:
         raise Exception(
             f'{response.content.decode()}\nresponse content ^\nuuid_or_ign: {uuid_or_ign}\n'
             f'typeOfRequest: {typeOfRequest}\nthere was a problem with response.json()'
         ) from e
 
-    if ('RateLimit-Remaining' in responseHeaders and int(responseHeaders['RateLimit-Remaining']) <= 2
-        and int(responseHeaders['RateLimit-Reset']) < 295):
-        # The < 295 condition is to not sleep when starting a new rate limit period, since it seems
-        # there's a bug in the api where the first response header gives a `RateLimit-Remaining` val that
-        # carries over from the previous period.
-        # Made an issue: https://github.com/HypixelDev/PublicAPI/issues/646
-        sleep_till = datetime.now() + timedelta(seconds=int(responseHeaders['RateLimit-Reset'])+1)
-
     if not responseJSON['success']:
+        responseJSON = JsonDecoding.decode(response.content)
+        if specific_api_key is None and _is_unusable_key_error(repr(responseJSON)):
+            _remove_api_key(api_key, responseJSON.get('cause', ''))
+            return _fetchJSON(typeOfRequest, uuid_or_ign, None, use_cache, fields)
         raise HypixelAPIError(responseJSON)
-    if typeOfRequest == 'player' and responseJSON['player'] is None:
+    if typeOfRequest == 'player' and responseJSON.get('player') is None:
         raise PlayerNotFoundException(uuid_or_ign)
-    try:
-        return responseJSON[typeOfRequest]
-    except KeyError:
-        return responseJSON
-
-def _get_api_key() -> str:
-    """This function returns the latest api key in `api-key.txt`. If the file doesn't exist, it will ask the
-       user for an api key and write it to the new file."""
-    global _api_key
-    if _api_key is not None:
-        return _api_key
-    FILENAME = 'api-key.txt'
-    if (not os.path.isfile(FILENAME) or not Utils.content_in_file(FILENAME) or
-        not _validate_api_key(Files.get_nth_line(FILENAME, -1))):
+    if cache_uuid:
+        ResponseCache.put(typeOfRequest, cache_uuid, response.content)
+    return _result_from_response(typeOfRequest, responseJSON, response.content, fields)
+
+def _decode_result(typeOfRequest: str, body: bytes, fields: Optional[tuple[tuple[str, ...], ...]]) -> dict:
+    """Decodes the body of a successful response, and returns the part of it `getJSON` should return."""
+    if fields is None:
+        return _result_from_response(typeOfRequest, JsonDecoding.decode(body), body, None)
+    paths = tuple((typeOfRequest,) + f for f in fields)
+    return _result_from_response(typeOfRequest, JsonDecoding.decode_paths(body, paths), body, fields)
+
+def _result_from_response(typeOfRequest: str, responseJSON: dict, body: bytes,
+                          fields: Optional[tuple[tuple[str, ...], ...]]) -> dict:
+    result = responseJSON.get(typeOfRequest, responseJSON if fields is None else {})
+    if fields is not None and typeOfRequest == 'player' and not PlayerRecord.shows_online_status(result):
+        # Only these players need a fingerprint, so only their player objects are decoded in full:
+        result[CONTENT_HASH_KEY] = content_hash(JsonDecoding.decode_paths(body, ((typeOfRequest,),))[typeOfRequest])
+    return result
+
+def content_hash(json_object: Any) -> str:
+    """Returns a hash of the json object's canonical encoding, so it doesn't depend on how the json was formatted
+       or what order its keys were in."""
+    return hashlib.blake2b(json.dumps(json_object, sort_keys=True, separators=(',', ':')).encode(),
+                           digest_size=16).hexdigest()
+
+def _get_api_keys() -> list[str]:
+    """Returns the pool of valid api keys in `api-key.txt`. If there aren't any, the user will be asked
+       for an api key, which will be appended to the file (which is created if it doesn't exist)."""
+    global _api_keys
+    if _api_keys is not None:
+        return _api_keys
+    keys = Utils.remove_duplicates(Files.get_lines(API_KEY_FILENAME)) if os.path.isfile(API_KEY_FILENAME) else []
+    _api_keys = [k for k in keys if _validate_api_key(k)]
+    if not _api_keys:
         print("The script needs a hypixel api key. You can get one from hypixel here: ", end='')
         print("https://developer.hypixel.net/dashboard")
         while not _validate_api_key(api_key := input("Please enter your api key: ").strip()):
             print("Sorry, either that api key is invalid, or you've reached the daily developer request limit.")
-        with open(FILENAME, 'a') as file:
+        with open(API_KEY_FILENAME, 'a') as file:
             file.write(f'\n{api_key}')
-    return (_api_key := Files.get_nth_line(FILENAME, -1))
+        _api_keys = [api_key]
+    elif len(_api_keys) > 1:
+        print(f"Using a pool of {len(_api_keys)} api keys.")
+    return _api_keys
+
+def _choose_api_key() -> str:
+    """Returns the key in the pool with the most rate limit budget left in its current window (any ties are
+       broken by the shortest projected wait)."""
+    with _api_keys_lock:
+        if not (keys := _get_api_keys()):
+            raise RuntimeError(f"None of the api keys in {API_KEY_FILENAME} can be used anymore.")
+        limiters = [_rate_limiters.setdefault(k, RateLimiter()) for k in keys]
+        return max(zip(keys, limiters), key=lambda x: (x[1].budget(), -x[1].projected_wait()))[0]
+
+def _remove_api_key(api_key: str, reason: str) -> None:
+    """Takes the key out of rotation for the rest of the run."""
+    with _api_keys_lock:
+        if api_key in (keys := _get_api_keys()):
+            keys.remove(api_key)
+            print(f"Api key ...{api_key[-4:]} is no longer being used ({reason}). {len(keys)} keys left.")
+
+def _is_unusable_key_error(error_info: str) -> bool:
+    return "Invalid API key" in error_info or "Daily developer key throttle" in error_info
 
 def _validate_api_key(key: str) -> bool:
     try:
         getJSON('leaderboards', None, specific_api_key=key)
     except HypixelAPIError as e:
-        if "Invalid API key" in repr(e) or "Daily developer key throttle" in repr(e):
+        if _is_unusable_key_error(repr(e)):
             return False
         raise RuntimeError('Unexpected error') from e
     return True
@@ -108,8 +269,7 @@ def get_uuid(uuid_or_ign: str, call_api_last_resort: bool = True) -> str:
     if Utils.is_uuid(uuid_or_ign):
         return uuid_or_ign
     ign = uuid_or_ign
-    possible_uuid = Files.ign_uuid_pairs_in_uuids_txt().get(ign,
-                    Files.ign_uuid_pairs_in_hypickle_cache().get(ign, ign))
+    possible_uuid = Files.ign_uuid_pairs_in_uuids_txt().get(ign) or ResponseCache.get_uuid_for_ign(ign) or ign
     if Utils.is_uuid(possible_uuid):
         if Player(possible_uuid).getName().lower() != ign:
             raise RuntimeError(f"NOTE: {ign} is no longer the ign of the player with uuid {possible_uuid}")
@@ -122,11 +282,73 @@ class PlayerNotFoundException(Exception):
 class HypixelAPIError(Exception):
     pass
 
+class PlayerRecord:
+    """Holds just the fields of a player's json that the program reads, so that the rest of the json
+       (which can be hundreds of KB) doesn't have to be kept in memory. The full json is only kept in
+       `raw_json` if the caller asks for it."""
+
+    FIELD_PATHS: dict[str, tuple[str, ...]] = {
+        'name': ('displayname',), 'uuid': ('uuid',),
+        'last_login': ('lastLogin',), 'last_logout': ('lastLogout',),
+        'bw_final_kills': ('stats', 'Bedwars', 'final_kills_bedwars'),
+        'bw_final_deaths': ('stats', 'Bedwars', 'final_deaths_bedwars'),
+        'bw_star': ('achievements', 'bedwars_level'), 'bw_xp': ('stats', 'Bedwars', 'Experience'),
+        'pit_xp': ('stats', 'Pit', 'profile', 'xp'),
+        'pit_playtime': ('stats', 'Pit', 'pit_stats_ptl', 'playtime_minutes'),
+        'pit_kills': ('stats', 'Pit', 'pit_stats_ptl', 'kills'),
+        'pit_deaths': ('stats', 'Pit', 'pit_stats_ptl', 'deaths'),
+        'network_xp': ('networkExp',),
+    }
+    PROJECTION = tuple(FIELD_PATHS.values()) + tuple((k,) for k in Rank.JSON_KEYS)
+    """The key paths to pass as `fields` to `getJSON`, when the full json isn't needed."""
+    __slots__ = tuple(FIELD_PATHS) + ('rank_fields', 'fingerprint', 'raw_json')
+    name: str
+    uuid: str
+    last_login: Optional[int]
+    last_logout: Optional[int]
+
+    def __init__(self, player_json: dict, keep_raw_json: bool) -> None:
+        for field, path in PlayerRecord.FIELD_PATHS.items():
+            setattr(self, field, Utils.nested_get(player_json, path, None))
+        self.rank_fields = {k: player_json[k] for k in Rank.JSON_KEYS if k in player_json}
+        self.fingerprint: Optional[str] = None
+        """The `content_hash` of the whole json, used to see if it's changed. Only needed (and so only computed)
+           for players whose online status isn't shown."""
+        if CONTENT_HASH_KEY in player_json:
+            self.fingerprint = player_json[CONTENT_HASH_KEY]
+        elif not self.online_status_shown():
+            self.fingerprint = content_hash(player_json)
+        self.raw_json = player_json if keep_raw_json else None
+
+    @staticmethod
+    def fetch(uuid_or_ign: str, use_cache: bool = True) -> PlayerRecord:
+        """Gets the player's json from the api, only decoding the fields needed unless the full json
+           has to be kept."""
+        keep_raw_json = args().get_player_json() or args().show_json_updates()
+        return PlayerRecord(getJSON('player', uuid_or_ign, use_cache=use_cache,
+                                    fields=None if keep_raw_json else PlayerRecord.PROJECTION), keep_raw_json)
+
+    def online_status_shown(self) -> bool:
+        return self.last_login is not None and self.last_logout is not None
+
+    @staticmethod
+    def shows_online_status(player_json: dict) -> bool:
+        """Like `online_status_shown`, for a player's json."""
+        return all(Utils.nested_get(player_json, PlayerRecord.FIELD_PATHS[field], None) is not None
+                   for field in ('last_login', 'last_logout'))
+
+    def stat(self, field: str, default_val: Any, expected_type: Optional[Type] = None) -> Any:
+        """Works like `Utils.nested_get`, but for the stat stored in `field`."""
+        val = getattr(self, field)
+        val = default_val if val is None else val
+        assert expected_type is None or type(val) == expected_type
+        return val
+
 class Player:
     def __init__(self, uuid_or_ign: str) -> None:
-        self.JSON = getJSON('player', get_uuid(uuid_or_ign, call_api_last_resort=False))
-        self._rank = Rank(self.JSON)
-        self.updated_json: Optional[tuple[dict, datetime]] = None
+        self._record = PlayerRecord.fetch(get_uuid(uuid_or_ign, call_api_last_resort=False))
+        self._rank = Rank(self._record.rank_fields)
+        self.updated_record: Optional[tuple[PlayerRecord, datetime]] = None
         """Stores the newest result of `getJSON('player')` that was updated from the previous call."""
         self.recent_games_visible: Optional[bool] = None
         """Recent games may not be visible if the player has turned off the api setting, or if they haven't
@@ -134,15 +356,21 @@ class Player:
         if Utils.is_ign(uuid_or_ign):
             # An ign was passed in, which means storing the uuid for it in the cache might help save
             # an api call in the near future:
-            Files.update_hypickle_cache(self.getName(), self.getUUID())
+            ResponseCache.put_uuid_for_ign(self.getName(), self.getUUID())
+
+    def getRawJSON(self) -> dict:
+        """Only available if the 'getplayerjson' or 'showjsonupdates' keywords were used."""
+        assert self._record.raw_json is not None
+        return self._record.raw_json
 
     def getName(self, extra_safety_check=True) -> str:
         """ Just return player's name. """
+        name = self._record.name
         if not extra_safety_check:
-            return self.JSON['displayname']
-        sanitized_name = re.sub("[^A-Za-z0-9_]", "", self.JSON['displayname'])
+            return name
+        sanitized_name = re.sub("[^A-Za-z0-9_]", "", name)
         # Only keeps alphanumerics and underscores.
-        if self.JSON['displayname'] != sanitized_name:
+        if name != sanitized_name:
             raise RuntimeError("Potentially unsafe character in ign - sanitized version is " + sanitized_name
             + ". To disable this safety check, call this function with getName(extra_safety_check=False).")
         if not Utils.is_ign(sanitized_name):
@@ -151,7 +379,7 @@ class Player:
 
     def getUUID(self) -> str:
         """ This function returns a player's UUID. """
-        return self.JSON['uuid']
+        return self._record.uuid
 
     def getFriends(self) -> list[UUID_Plus_Time]:
         """ *Deprecated from Hypixel API*
@@ -162,64 +390,72 @@ class Player:
             friends.append(UUID_Plus_Time(friend_uuid, friend['started']))
         return list(reversed(friends))
 
-    def isOnline(self, extra_online_checks: tuple[bool, bool, bool]) -> bool:
+    def isOnline(self, extra_online_checks: tuple[bool, bool, bool], use_cache: bool = True) -> bool:
         """ This function returns a bool representing whether the player is online.
             For `extra_online_checks`:
                 - The first bool is for players whose online status is shown. It determines whether to check
                   the current online statuses of players, irrespective of whether they were recorded as
-                  online in the original self.JSON. So, this bool being true limits false negatives, at
+                  online in the original player json. So, this bool being true limits false negatives, at
                   the expense of more api calls.
                 - The second bool determines whether to call the api for the most recent json to see if
                   it's changed, for players whose online status is disabled.
                 - The third bool determines whether, as a last resort, to call the `recentgames` endpoint,
                   in order to see if the most recent game is visible, and if it doesn't have an
-                  'ended' key; if so, the player is online."""
-        if {'lastLogin', 'lastLogout'} <= self.JSON.keys():
-            return (    (extra_online_checks[0] or self.JSON['lastLogin'] > self.JSON['lastLogout'])
-                    and getJSON('status', self.getUUID())['session']['online'])
+                  'ended' key; if so, the player is online.
+            `use_cache` determines whether recently cached responses can be used for the status/recentgames
+            endpoints. The call to see if the player json has changed never uses the cache."""
+        if self._record.online_status_shown():
+            assert self._record.last_login is not None and self._record.last_logout is not None
+            return (    (extra_online_checks[0] or self._record.last_login > self._record.last_logout)
+                    and getJSON('status', self.getUUID(), use_cache=use_cache)['session']['online'])
         # This player doesn't have the online status shown, but we can check if stats from
-        # the original self.JSON have updated (if the caller has enabled this feature):
-        if extra_online_checks[1] and self.JSON != (json := getJSON('player', self.getUUID())):
-            self.set_updated_json_if_applicable(json)
+        # the original player json have updated (if the caller has enabled this feature):
+        if extra_online_checks[1] and self._record.fingerprint != (
+            record := PlayerRecord.fetch(self.getUUID(), use_cache=False)
+        ).fingerprint:
+            self.set_updated_record_if_applicable(record)
             return True
-        return extra_online_checks[2] and bool(games := self.getRecentGames()) and 'ended' not in games[0]
+        return (extra_online_checks[2] and bool(games := self.getRecentGames(use_cache))
+                and 'ended' not in games[0])
 
-    def set_updated_json_if_applicable(self, new_json: dict) -> None:
-        if new_json == (curr_latest_json := self.updated_json[0] if self.updated_json else self.JSON):
+    def set_updated_record_if_applicable(self, new_record: PlayerRecord) -> None:
+        curr_latest_record = self.updated_record[0] if self.updated_record else self._record
+        if new_record.fingerprint == curr_latest_record.fingerprint:
             return
         if args().show_json_updates():
-            Utils.print_diff_dicts(curr_latest_json, new_json, f"\nUpdates to json for {self.getName()}: ")
-        self.updated_json = (new_json, datetime.now())
+            assert curr_latest_record.raw_json is not None and new_record.raw_json is not None
+            Utils.print_diff_dicts(curr_latest_record.raw_json, new_record.raw_json,
+                                   f"\nUpdates to json for {self.getName()}: ")
+        self.updated_record = (new_record, datetime.now())
 
     def getFKDR(self) -> float:
         return Utils.kdr_division(
-            Utils.nested_get(self.JSON, ('stats', 'Bedwars', 'final_kills_bedwars'), 0, int),
-            Utils.nested_get(self.JSON, ('stats', 'Bedwars', 'final_deaths_bedwars'), 0, int)
+            self._record.stat('bw_final_kills', 0, int), self._record.stat('bw_final_deaths', 0, int)
         )
 
     def getBedwarsStar(self) -> int:
-        return Utils.nested_get(self.JSON, ('achievements', 'bedwars_level'), 0, int)
+        return self._record.stat('bw_star', 0, int)
 
     def getBedwarsXP(self) -> int:
-        xp = Utils.nested_get(self.JSON, ('stats', 'Bedwars', 'Experience'), 0)
+        xp = self._record.stat('bw_xp', 0)
         assert int(xp) == xp
         return int(xp)
 
     def getPitXP(self) -> int:
-        return Utils.nested_get(self.JSON, ('stats', 'Pit', 'profile', 'xp'), 0, int)
+        return self._record.stat('pit_xp', 0, int)
 
     def getPitPlaytime(self) -> int:
         """Returns the total pit playtime in minutes."""
-        return Utils.nested_get(self.JSON, ('stats', 'Pit', 'pit_stats_ptl', 'playtime_minutes'), 0, int)
+        return self._record.stat('pit_playtime', 0, int)
 
     def getPitKills(self) -> int:
-        return Utils.nested_get(self.JSON, ('stats', 'Pit', 'pit_stats_ptl', 'kills'), 0, int)
+        return self._record.stat('pit_kills', 0, int)
 
     def getPitDeaths(self) -> int:
-        return Utils.nested_get(self.JSON, ('stats', 'Pit', 'pit_stats_ptl', 'deaths'), 0, int)
+        return self._record.stat('pit_deaths', 0, int)
 
     def getNetworkXP(self) -> int:
-        xp = self.JSON.get('networkExp', 0)
+        xp = self._record.stat('network_xp', 0)
         assert int(xp) == xp
         return int(xp)
 
@@ -229,8 +465,10 @@ class Player:
     def getNetworkRank(self) -> Rank:
         return self._rank
 
-    def getRecentGames(self) -> list[dict]:
+    def getRecentGames(self, use_cache: bool = True) -> list[dict]:
         if self.recent_games_visible is False:
             return []
-        self.recent_games_visible = bool(recent_games := getJSON('recentgames', self.getUUID())['games'])
+        self.recent_games_visible = bool(
+            recent_games := getJSON('recentgames', self.getUUID(), use_cache=use_cache)['games']
+        )
         return recent_games
@@ -1,65 +1,40 @@
 from __future__ import annotations
 import sys
+import os
 from typing import Optional
 from itertools import permutations
-from copy import deepcopy
 
 from . import hypixel
 from . import MyClasses
 from .MyClasses import Specs, UUID_Plus_Time, args
 from . import Files
 from .Player import Player
+from .FriendList import FriendList
 from . import ProcessingResults
+from . import ResultsIndex
+from . import Archive
+from . import SnapshotStore
 from . import additional_friends
 from . import Utils
+from . import FriendsExpression
 from . import Pit
 from . import leveling
 from . import bedwars
 from . import Graphing
 from .Graphing import ScatterplotInfo
 
-def intersect_player_lists(l1: list[Player], l2: list[Player]) -> list[Player]:
-    return [p for p in l1 if p.in_player_list(l2)]
-
-def combine_players(info_on_players: list[Player]) -> Player:
-    """This function runs through the Player list and adds/subtracts/intersects f lists. Whether a Player's f list
-    is used to add/subtract/intersect depends on the bool value of their player.will_exclude_friends()
-    and player.will_intersect() functions.
-    If a player's f list is used to intersect, it will intersect the entire friends list up to that point,
-    either for playerFriends or exclude_friends.
-    Order of operations:
-        union, intersect (left to right for precedence amongst these)
-        subtract
-    """
-    info_on_players = deepcopy(info_on_players)
-    playerNameForFileOutput = info_on_players[0].name()
-    playerUUID = info_on_players[0].uuid()
-    playerFriends: list[Player] = info_on_players[0].friends()
-    playerSpecs = info_on_players[0].specs()
-    date_cutoff_friends = info_on_players[0].date_cutoff_for_friends()
-
-    exclude_friends: list[Player] = []
-    for player in info_on_players[1:]:
-        if player.will_exclude_friends():
-            if player.will_intersect():
-                exclude_friends = intersect_player_lists(exclude_friends, player.friends())
-                playerNameForFileOutput += ' intersect ' + player.name()
-            else:
-                exclude_friends.extend(player.friends())
-                playerNameForFileOutput += ' minus ' + player.name()
-        else:
-            if player.will_intersect():
-                playerFriends = intersect_player_lists(playerFriends, player.friends())
-                playerNameForFileOutput += ' intersect ' + player.name()
-            else:
-                playerFriends.extend(player.friends())
-                playerNameForFileOutput += ' plus ' + player.name()
-
-    player = Player(playerUUID, friends=playerFriends, name_for_file_output=playerNameForFileOutput,
-                    specs=playerSpecs, date_cutoff_for_friends=date_cutoff_friends,
-                    players_used_to_combine=deepcopy(info_on_players)
+def combine_players(info_on_players: list[Player], expression: FriendsExpression.Expression) -> Player:
+    """Combines the f lists of the Players as `expression` says (see FriendsExpression.py for the syntax).
+    `info_on_players` should have one Player per distinct operand in the expression, in the same order.
+    The Player returned represents the first of these players, with the combined f list."""
+    first_player = info_on_players[0]
+    player = Player(first_player.uuid(),
+                    friends=FriendsExpression.evaluate(expression, [p.friend_list() for p in info_on_players]),
+                    name_for_file_output=expression.describe([p.name() for p in info_on_players]),
+                    specs=first_player.specs(), date_cutoff_for_friends=first_player.date_cutoff_for_friends(),
+                    players_used_to_combine=list(info_on_players)
                     if args().track_if_arg_players_online() else None)
-    player.polish_friends_list(exclude_friends)
+    player.polish_friends_list([])
     return player
 
 def diff_f_lists(players: list[Player]) -> None:
@@ -70,53 +45,32 @@ def diff_f_lists(players: list[Player]) -> None:
     for p1, p2 in permutations(players, 2):
         p1.diff_f_lists(p2, list_friends)
 
-def get_players_from_args() -> tuple[list[Player], list[str]]:
-    """The first item in the tuple will be a list of Players.
+def get_players_from_args() -> tuple[list[Player], list[str], FriendsExpression.Expression]:
+    """The first item in the tuple will be a list of Players, one for each distinct operand of the expression
+       in the args (which is the third item).
        The second item will likely be empty for most use cases. However, if the caller wants this feature,
        it will be a list of uuid strings, where it's intended for each uuid to be checked for when they
        were friended by a Player in the first list."""
 
     specs = Specs.make_specs_object_and_initialize_common_specs()
     args_no_keywords_or_date = args().get_args(True)
-    players: list[Player] = []
-    in_minus_symbol_section = False
-    in_friended_when_section = False
-    is_intersect_player = False
     FRIENDED_WHEN = 'friendedwhen'
-    INTERSECT = 'intersect'
-    uuids_for_friended_when: list[str] = []
-
-    for i, arg in enumerate(args_no_keywords_or_date):
-        if in_minus_symbol_section or in_friended_when_section or is_intersect_player:
-            assert not args().do_mini_program()
-
-        if arg.endswith('.txt'):
-            assert not in_friended_when_section
-            continue
-        if arg == '-':
-            in_minus_symbol_section = True
-            assert not in_friended_when_section
-            continue
-        if arg == FRIENDED_WHEN:
-            in_friended_when_section = True
-            in_minus_symbol_section = False
-            continue
-        if arg == INTERSECT:
-            is_intersect_player = True
-            assert not in_friended_when_section
-            continue
-
-        if in_friended_when_section:
-            uuids_for_friended_when.append(hypixel.get_uuid(arg))
-            continue
+    expression_args, friended_when_args = args_no_keywords_or_date, []
+    if FRIENDED_WHEN in args_no_keywords_or_date:
+        i = args_no_keywords_or_date.index(FRIENDED_WHEN)
+        expression_args, friended_when_args = args_no_keywords_or_date[:i], args_no_keywords_or_date[i+1:]
+    tokens = FriendsExpression.tokenize(expression_args)
+    if any(t in ('-', 'intersect', '(', ')') for t in tokens) or FRIENDED_WHEN in args_no_keywords_or_date:
+        assert not args().do_mini_program()
+    expression, operands = FriendsExpression.parse(tokens)
+    players: list[Player] = []
 
-        next_arg = args_no_keywords_or_date[i+1] if i+1 < len(args_no_keywords_or_date) else None
-        use_specific_textfile = next_arg and next_arg.endswith('.txt')
+    for i, (arg, textfile) in enumerate(operands):
         num_friends_msgs = ['', '']
 
-        if use_specific_textfile:
+        if textfile:
             assert not args().do_file_output()
-            player = Player.make_player_from_json_textfile(args_no_keywords_or_date[i+1], arg, specs=specs)
+            player = Player.make_player_from_json_textfile(textfile, arg, specs=specs)
         else:
             hypixel_obj = hypixel.Player(arg)
             uuid = hypixel_obj.getUUID()
@@ -128,12 +82,11 @@ def get_players_from_args() -> tuple[list[Player], list[str]]:
             if args().get_additional_friends():
                 all_friends = ProcessingResults.get_all_additional_friends_for_player(uuid)
                 num_friends_msgs[1] = f"{len(all_friends)} unique manually added friends\n"
-                for f in standard_friends:
-                    ProcessingResults.update_list_if_applicable(all_friends, f)
+                all_friends = ProcessingResults.merge_friends_lists((all_friends, standard_friends))
             else:
                 all_friends = standard_friends
-            all_friends.sort(key=UUID_Plus_Time.sort_key)
-            player = Player(uuid, specs=specs, friends=all_friends, hypixel_object=hypixel_obj)
+            player = Player(uuid, specs=specs, friends=FriendList.from_uuid_plus_times(all_friends).sorted_by_time(),
+                            hypixel_object=hypixel_obj)
 
         if Utils.is_ign(arg):
             print("This player's uuid is " + player.uuid())
@@ -141,25 +94,27 @@ def get_players_from_args() -> tuple[list[Player], list[str]]:
         print(num_friends_msgs[0] + num_friends_msgs[1], end='')
         player.print_player_info()
 
-        player.set_will_exclude_friends(in_minus_symbol_section)
-        player.set_will_intersect(is_intersect_player)
+        # If a player is used both ways in the expression, the date cutoff still applies to their friends.
+        player.set_will_exclude_friends(all(excluded for j, excluded in expression.operand_uses() if j == i))
         if not player.will_exclude_friends():
             player.set_date_cutoff_for_friends(args().date_cutoff())
         players.append(player)
-        is_intersect_player = False
 
-    return (players, uuids_for_friended_when)
+    for arg in friended_when_args:
+        assert arg not in ('-', 'intersect', '(', ')') and not Files.is_friends_file(arg)
+    return (players, [hypixel.get_uuid(arg) for arg in friended_when_args], expression)
 
 def output_player_jsons_to_file(players: list[Player]) -> None:
     for player in players:
         Files.write_data_as_json_to_file(player.player_JSON(), "Player json for " + player.name(),
-                                         "results/player-jsons")
+                                         Files.PLAYER_JSONS_FOLDER, args().compress_output())
 
 def friended_when_feature(players: list[Player], uuids_for_friended_when: list[str]) -> None:
     for player in players:
-        for friend in player.friends():
-            if friend.uuid() not in uuids_for_friended_when:
+        for i, uuid in enumerate(player.friend_list().uuids()):
+            if uuid not in uuids_for_friended_when:
                 continue
+            friend = player.friend(i)
             time_friended = friend.time_friended_parent_player('date')
             if time_friended is not None:
                 assert isinstance(time_friended, str)
@@ -176,6 +131,11 @@ def do_mini_program() -> None:
         Files.update_aliases(
             args().get_keywords(), ((p.name(), p.uuid()) for p in get_players_from_args()[0])
         )
+    elif args().restore_aliases() or args().restore_uuids():
+        date_string = args().date_cutoff()
+        assert date_string
+        Files.restore_journaled_pairs(Files.ALIASES_FILENAME if args().restore_aliases() else Files.UUIDS_FILENAME,
+                                      date_string)
     elif args().print_aliases():
         Files.print_aliases()
     elif args().get_player_json():
@@ -218,14 +178,48 @@ def do_mini_program() -> None:
     elif args().comma_sep_list():
         for player in (players := get_players_from_args()[0]):
             print(f"uuids of {player.name()}'s friends:")
-            for friend in player.friends():
-                print(f"{friend.uuid()}, ", end='')
+            for uuid in player.friend_list().uuids():
+                print(f"{uuid}, ", end='')
             print('\n')
         for player in players:
             print(f"igns of {player.name()}'s friends:")
             for friend in player.friends():
                 print(f"{friend.name()}, ", end='', flush=True)
             print('\n')
+    elif args().convert_results():
+        Archive.convert_files(ResultsIndex.results_files(json_only=True))
+    elif args().store_snapshots():
+        SnapshotStore.store_files(ResultsIndex.results_files())
+    elif args().export_snapshots():
+        SnapshotStore.export_snapshots()
+    elif args().compress_results():
+        player_jsons = ([entry.path for entry in os.scandir(Files.PLAYER_JSONS_FOLDER)
+                         if Files.is_json_file(entry.name)] if os.path.isdir(Files.PLAYER_JSONS_FOLDER) else [])
+        Files.compress_files(ResultsIndex.results_files(json_only=True) + player_jsons)
+    elif args().graph_degree() or args().graph_friends():
+        graph = ProcessingResults.friend_graph()
+        names = ProcessingResults.uuid_ign_pairs_in_results()
+        for arg in args().get_args(True):
+            uuid = hypixel.get_uuid(arg)
+            print(f"{arg} has {graph.degree(uuid)} distinct friends recorded in the results folder" +
+                  (':' if args().graph_friends() else '.'))
+            if args().graph_friends():
+                print(*(f"{names.get(f_uuid, '')} {f_uuid}".strip() for f_uuid in graph.neighbours(uuid)), sep='\n',
+                      end='\n\n')
+    elif args().graph_distance():
+        (uuid, other_uuid) = (hypixel.get_uuid(arg) for arg in args().get_args(True))
+        names = ProcessingResults.uuid_ign_pairs_in_results()
+        if (path := ProcessingResults.friend_graph().shortest_path(uuid, other_uuid)) is None:
+            print("There's no chain of friendships between them in the results folder.")
+        else:
+            print(f"Distance of {len(path) - 1}: " + ' -> '.join(names.get(p_uuid, p_uuid) for p_uuid in path))
+    elif args().graph_hops():
+        *graph_players, max_hops = args().get_args(True)
+        for arg in graph_players:
+            layers = ProcessingResults.friend_graph().hop_layers(hypixel.get_uuid(arg), int(max_hops))
+            print(f"{arg}: " + ', '.join(f"{len(layer)} players at distance {hops}"
+                                         for hops, layer in enumerate(layers) if hops > 0) +
+                  f" ({sum(len(layer) for layer in layers) - 1} within {max_hops} hops)")
     elif args().list_features():
         print(*sorted(args().get_keywords()), sep='\n')
     else:
@@ -251,15 +245,15 @@ def main(argv: Optional[list[str]] = None) -> None:
 
     if args().find_matching_igns_or_uuids_in_results():
         ProcessingResults.print_all_matching_uuids_or_igns(args().get_args(True)[0])
-    players_from_args, uuids_for_friended_when = get_players_from_args()
+    players_from_args, uuids_for_friended_when, expression = get_players_from_args()
     if args().diff_f_lists():
         diff_f_lists(players_from_args)
     if uuids_for_friended_when:
         friended_when_feature(players_from_args, uuids_for_friended_when)
 
-    player = combine_players(players_from_args)
+    player = combine_players(players_from_args, expression)
     player.keep_just_first_or_last_friends(newest_n_friends, oldest_n_friends)
-    print(f"Now {len(player.friends())} friends after adjustments specified in args.\n\n")
+    print(f"Now {len(player.friend_list())} friends after adjustments specified in args.\n\n")
 
     if args().check_results():
         ProcessingResults.check_results(player.uuid(), player.name())
@@ -275,7 +269,10 @@ def main(argv: Optional[list[str]] = None) -> None:
         filename = ("Friends of " +
                     ("friends of " if args().find_friends_of_friends() else "") +
                     player.name_for_file_output())
-        Files.write_data_as_json_to_file(report, filename)
+        if args().do_archive_output():
+            Archive.write(report, filename)
+        else:
+            Files.write_data_as_json_to_file(report, filename, compress=args().compress_output())
 
 if __name__ == '__main__':
     main()
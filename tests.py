@@ -1,9 +1,24 @@
 from __future__ import annotations
+import dataclasses
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from copy import deepcopy
 from lintception import linters # type: ignore
 import pytest
 
-from hypickle.MyClasses import Specs
-from hypickle import leveling, Colours
+from hypickle.MyClasses import Specs, UUID_Plus_Time
+from hypickle import (leveling, Colours, RateLimiter, ProcessingResults, FriendsExpression, UuidTable, Archive,
+                      SnapshotStore, Files, ResponseCache, ResultsIndex, hypixel, MyClasses)
+from hypickle.Args import Args
+from hypickle.FriendList import FriendList
+from hypickle.FriendGraph import FriendGraph
 
 Specs.set_common_specs(False)
 
@@ -25,11 +40,27 @@ class Tests:
         pass
     """
 
-    def test_deep_copy_Specs_constructor(self):
+    @pytest.fixture
+    def tmp_cwd(self, tmp_path, monkeypatch):
+        """Runs the test in an empty directory (which is returned), with none of the files the program keeps
+           in the working directory (the results index, uuid table, caches, etc.) opened yet."""
+        def reset() -> None:
+            for module in (ResponseCache, ResultsIndex, SnapshotStore):
+                module.close()
+            UuidTable.reset()
+        reset()
+        monkeypatch.chdir(tmp_path)
+        yield tmp_path
+        reset()
+
+    def test_Specs_immutable_and_interned(self):
         friends_specs = Specs(False, True, None, 1)
         specs = Specs(False, False, friends_specs, 0)
-        specs._friends_specs._just_uuids = True
-        assert not friends_specs._just_uuids
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            specs._friends_specs._just_uuids = True # type: ignore
+        assert not friends_specs.just_uuids()
+        assert Specs(False, False, Specs(False, True, None, 1), 0) is specs
+        assert deepcopy(specs) is specs and specs.specs_for_friends() is friends_specs
 
     def test_network_levels(self):
         level_range = range(1, 10001)
@@ -65,6 +96,304 @@ class Tests:
         with pytest.raises(AssertionError):
             leveling.getTotalExpToLevelFloor(1.9999)
 
+    def test_rate_limiter(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(RateLimiter, 'monotonic', lambda: now[0])
+        limiter = RateLimiter.RateLimiter(limit=100, window_secs=100)
+        waits = [limiter.reserve() for _ in range(100)]
+        assert waits[:10] == [0]*10 and all(w > 0 for w in waits[10:])
+        assert waits == sorted(waits) and waits[-1] < 100 and limiter.budget() == 0
+        assert limiter.reserve() >= 100
+        now[0] += 250
+        for _ in range(101):
+            limiter.update({})
+        assert limiter.budget() == 100 and limiter.projected_wait() == 0
+        limiter.reserve()
+        limiter.update({'RateLimit-Limit': '100', 'RateLimit-Remaining': '0', 'RateLimit-Reset': '40'})
+        assert limiter.budget() == 0 and limiter.projected_wait() == 41
+
+    def test_merge_friends_lists(self):
+        a, b, c = 'a'*32, 'b'*32, 'c'*32
+        merged = ProcessingResults.merge_friends_lists((
+            [UUID_Plus_Time(a, 1600000000), UUID_Plus_Time(b, None)],
+            [UUID_Plus_Time(c, 1500000000), UUID_Plus_Time(a, 1500000000), UUID_Plus_Time(b, 1700000000)],
+            [UUID_Plus_Time(a, 1600000000000), UUID_Plus_Time(c, 1500000000000)]
+        ))
+        assert [f.uuid() for f in merged] == [a, b, c]
+        assert [f.time_epoch_in_seconds() for f in merged] == [1600000000, 1700000000, 1500000000]
+
+    def test_friends_expression_parse(self):
+        tokens = FriendsExpression.tokenize(['a', 'a.txt', '-', '(b', 'intersect', 'c)', 'd', 'a'])
+        assert tokens == ['a', 'a.txt', '-', '(', 'b', 'intersect', 'c', ')', 'd', 'a']
+        expression, operands = FriendsExpression.parse(tokens)
+        assert operands == [('a', 'a.txt'), ('b', None), ('c', None), ('d', None), ('a', None)]
+        assert expression.describe([name for name, _ in operands]) == 'a minus b intersect c minus d minus a'
+        assert list(expression.operand_uses()) == [(0, False), (1, True), (2, True), (3, True), (4, True)]
+        with pytest.raises(AssertionError):
+            FriendsExpression.parse(FriendsExpression.tokenize(['(a', 'b']))
+
+    def test_friends_expression_evaluate(self):
+        u1, u2, u3, u4, u5 = (f"{i:032x}" for i in range(0xe1, 0xe6))
+        def friends(*pairs: tuple[str, float]) -> FriendList:
+            return FriendList(array('I', (UuidTable.to_id(uuid) for uuid, _ in pairs)),
+                              array('d', (t for _, t in pairs)))
+        lists = {'a': friends((u1, 5), (u2, 3), (u3, math.nan)), 'b': friends((u2, 7), (u4, 1)),
+                 'c': friends((u1, 2), (u2, 1), (u5, 9)), 'd': friends((u3, 1))}
+        def combine(*args: str) -> list[tuple[str, float]]:
+            expression, operands = FriendsExpression.parse(FriendsExpression.tokenize(list(args)))
+            result = FriendsExpression.evaluate(expression, [lists[name] for name, _ in operands])
+            return [(result.uuid(i), result.sort_keys()[i]) for i in range(len(result))]
+        assert combine('a', 'b') == [(u2, 7), (u1, 5), (u4, 1), (u3, 0)] # u2's most recent time is kept.
+        assert combine('a', 'intersect', 'c') == [(u1, 5), (u2, 3)] # Times come from the left side.
+        assert combine('a', 'b', '-', 'c', 'd') == [(u4, 1)]
+        assert combine('a', '-', '(b', 'intersect', 'c)') == [(u1, 5), (u3, 0)]
+        assert combine('a', 'b', 'intersect', 'c') == [(u2, 7), (u1, 5)] # I.e., (a b) intersect c.
+        assert combine('a', 'b', 'intersect', '(c', 'd)', '-', 'b') == [(u1, 5), (u3, 0)]
+
+    def test_uuid_table(self):
+        uuid = '0123456789abcdef0123456789abcdef'
+        uuid_id = UuidTable.to_id(uuid)
+        assert UuidTable.to_id(uuid) == UuidTable.get_id(uuid) == uuid_id
+        assert UuidTable.to_uuid(uuid_id) == uuid and UuidTable.size() > uuid_id
+        assert UuidTable.from_bytes(UuidTable.to_bytes(uuid)) == uuid and len(UuidTable.to_bytes(uuid)) == 16
+        with pytest.raises(AssertionError):
+            UuidTable.to_id('0123456789ABCDEF0123456789ABCDEF')
+
+    def test_uuid_table_save(self, tmp_cwd):
+        a, b, c, d = 'a'*32, 'b'*32, 'c'*32, 'd'*32
+        assert UuidTable.to_id(a, persist=True) == 0 and UuidTable.to_id(b) == 1
+        UuidTable.save()
+        UuidTable.reset()
+        assert UuidTable.get_id(a) == 0 and UuidTable.get_id(b) is None # b's id was only for this run.
+        table = tmp_cwd / UuidTable.TABLE_FILENAME
+        assert table.stat().st_size == UuidTable.RECORD_SIZE
+        # Another run appending records that agree with the ids given here:
+        assert UuidTable.to_id(c, persist=True) == 1
+        with open(table, 'ab') as f:
+            f.write(UuidTable.to_bytes(c) + UuidTable.to_bytes(d))
+        UuidTable.save()
+        assert table.stat().st_size == 3 * UuidTable.RECORD_SIZE and UuidTable.get_id(d) == 2
+        # And records that don't, which aren't overwritten:
+        assert UuidTable.to_id(b, persist=True) == 3
+        with open(table, 'ab') as f:
+            f.write(UuidTable.to_bytes(a[:-1] + 'b'))
+        with pytest.raises(RuntimeError):
+            UuidTable.save()
+        assert table.stat().st_size == 4 * UuidTable.RECORD_SIZE
+        assert not os.path.exists(UuidTable.LOCK_FILENAME)
+
+    def test_friend_list(self):
+        a, b, c = 'a'*32, 'b'*32, 'c'*32
+        friends = FriendList.from_uuid_plus_times([UUID_Plus_Time(a, None), UUID_Plus_Time(b, '2020-01-01'),
+                                                   UUID_Plus_Time(c, 1600000000), UUID_Plus_Time(b, 1500000000)])
+        assert friends.uuids() == [a, b, c, b] and friends.time_ms(0) is None
+        assert friends.sorted_by_time().uuids() == [c, b, b, a]
+        assert friends.sorted_by_time().deduplicated().uuids() == [c, b, a]
+        assert friends.added_since('2019-06-01').uuids() == [b, c]
+        assert friends.first(1).uuids() == [a] and friends.last(2).uuids() == [c, b] and not friends.last(0)
+        assert friends.excluding({UuidTable.to_id(b)}).uuids() == [a, c]
+
+    def test_archive(self, tmp_path):
+        a, b, c = 'a'*32, 'b'*32, 'c'*32
+        report = {'uuid': a, 'name': 'A', 'fkdr': 1.5, 'star': 100, 'pit_rank': 'II-40', 'friends': [
+                     {'uuid': b, 'time': '2020-01-01', 'friends': [{'uuid': c, 'time': 1600000000}]},
+                     {'uuid': c, 'name': 'C', 'time': None, 'friends': []}, {'uuid': b, 'time': 1.6e12}]}
+        (path := tmp_path / f"Friends of A{Archive.EXTENSION}").write_bytes(Archive.to_bytes(report))
+        assert Archive.read_results_file(str(path)) == report
+        columns = Archive.read_columns(str(path))
+        assert len(columns) == 5 and columns.pos.tolist() == [0, 1, 3, 4, 2]
+        assert [columns.uuid[i*16:(i+1)*16].hex() for i in columns.friend_rows(0)] == [b, c, b]
+        os.remove(path) # The file isn't left memory mapped, so it can be deleted (which Windows requires).
+        path.write_bytes(b'')
+        with pytest.raises(AssertionError, match="too short"):
+            Archive.read_columns(str(path))
+        for unsupported in ({'uuid': a, 'fkdr': 1}, {'uuid': a, 'time': 1196916701.654414}, {'uuid': a, 'rank': 'VIP'}):
+            with pytest.raises(ValueError):
+                Archive.to_bytes(unsupported)
+
+    def test_results_index(self, tmp_cwd, monkeypatch):
+        a, b, c, d, e, f = (f"{i:032x}" for i in range(1, 7))
+        def write(filename: str, report: dict, mtime: int) -> None:
+            (path := tmp_cwd / ResultsIndex.RESULTS_FOLDER / filename).write_text(json.dumps(report))
+            os.utime(path, (mtime, mtime))
+        (tmp_cwd / ResultsIndex.RESULTS_FOLDER).mkdir()
+        write("Friends of A.txt", {'uuid': a, 'name': 'A', 'friends': [{'uuid': b, 'name': 'B', 'time': 1600000000},
+                                                                       {'uuid': c, 'time': None}]}, 2)
+        write("Friends of B.txt", {'uuid': b, 'name': 'B', 'friends': [{'uuid': a}, {'uuid': c}, {'uuid': d}]}, 1)
+        write("Friends of A plus E.txt", {'uuid': a, 'friends': [{'uuid': e, 'friends': [{'uuid': f}]}]}, 3)
+        write("Additional friends of C.txt", {'uuid': c, 'name': 'C', 'friends': [{'uuid': f, 'time': None}]}, 4)
+        monkeypatch.setattr(MyClasses, '_args', Args(['main.py', 'a']))
+        assert ResultsIndex.best_friends_list(a) == [(b, 1600000000000.0), (c, None)]
+        assert ResultsIndex.best_friends_list(b) == [(a, None), (c, None), (d, None)]
+        assert ResultsIndex.best_friends_list(e) is None and ResultsIndex.best_friends_list('f'*32) is None
+        assert ResultsIndex.name_uuid_pairs(False) == [('A', a), ('B', b), ('B', b)]
+        assert ResultsIndex.name_uuid_pairs(True) == [('C', c)]
+        assert ResultsIndex.friends_lists(c, True) == [[(f, None)]] and ResultsIndex.num_unique_uuids() == 5
+        monkeypatch.setattr(MyClasses, '_args', Args(['main.py', 'a', 'includemultiplayerfiles']))
+        assert ResultsIndex.best_friends_list(e) == [(f, None)] and ResultsIndex.num_unique_uuids() == 6
+        assert ResultsIndex.best_friends_list(a) == [(b, 1600000000000.0), (c, None)] # The outer dict is skipped.
+        monkeypatch.setattr(MyClasses, '_args', Args(['main.py', 'a', 'includemultiplayerfiles',
+                                                      'keepfirstdictmultifiles']))
+        assert ResultsIndex.friends_lists(a, False) == [[(e, None)], [(b, 1600000000000.0), (c, None)]]
+        write("Friends of B.txt", {'uuid': b, 'name': 'Bee', 'friends': [{'uuid': d}]}, 5)
+        os.remove(tmp_cwd / ResultsIndex.RESULTS_FOLDER / "Additional friends of C.txt")
+        ResultsIndex.close() # So that the next query refreshes the index.
+        assert ResultsIndex.best_friends_list(b) == [(d, None)] and ResultsIndex.friends_lists(c, True) == []
+        assert ResultsIndex.name_uuid_pairs(False) == [('Bee', b), ('A', a), ('B', b)]
+
+    def test_snapshot_store(self, tmp_cwd, monkeypatch):
+        friends = [{'uuid': f"{i:032x}", 'time': 1600000000 + i} for i in range(100)]
+        reports = [{'uuid': 'a'*32, 'friends': friends},
+                   {'uuid': 'a'*32, 'friends': friends[:50] + [{'uuid': 'b'*32}] + friends[60:]}]
+        for i, report in enumerate(reports):
+            (tmp_cwd / f"Friends of A - {i}.json").write_text(json.dumps(report))
+            os.utime(tmp_cwd / f"Friends of A - {i}.json", (i, i))
+        SnapshotStore.store_files(str(p) for p in tmp_cwd.glob('*.json'))
+        assert not list(tmp_cwd.glob('*.json'))
+        paths = sorted(SnapshotStore.snapshot_paths())
+        assert [SnapshotStore.read(path) for path in paths] == reports
+        with closing(sqlite3.connect(SnapshotStore.STORE_FILENAME)) as connection:
+            assert connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0] == 100 + 1 + 2
+            assert connection.execute("SELECT COUNT(*) FROM nodes WHERE base IS NOT NULL").fetchone()[0] == 1
+        # A file that's stored again (as if the last run stopped before deleting it) replaces its snapshot:
+        (tmp_cwd / "Friends of A - 0.json").write_text(json.dumps(reports[0]))
+        os.utime(tmp_cwd / "Friends of A - 0.json", (0, 0))
+        SnapshotStore.store_files([str(tmp_cwd / "Friends of A - 0.json")])
+        assert sorted(SnapshotStore.snapshot_paths()) == paths and not list(tmp_cwd.glob('*.json'))
+        monkeypatch.setattr(SnapshotStore, 'MAX_CACHED_DICTS', 10)
+        SnapshotStore.close()
+        assert [SnapshotStore.read(path) for path in paths] == reports
+        SnapshotStore.export_snapshots(str(tmp_cwd / "results"))
+        assert not SnapshotStore.snapshot_paths()
+        for i, report in enumerate(reports):
+            assert json.loads((path := tmp_cwd / "results" / f"Friends of A - {i}.json").read_text()) == report
+            assert os.path.getmtime(path) == i
+
+    def test_snapshot_store_failed_check(self, tmp_cwd, monkeypatch, capsys):
+        report = {'uuid': 'a'*32, 'friends': [{'uuid': 'b'*32, 'time': 1600000000}]}
+        (path := tmp_cwd / "Friends of A.json").write_text(json.dumps(report))
+        monkeypatch.setattr(SnapshotStore, 'read', lambda _: {}) # As if the snapshot didn't read back the same.
+        SnapshotStore.store_files([str(path)])
+        assert path.is_file() and "Moved 0 files (0 bytes)" in capsys.readouterr().out
+        SnapshotStore.close()
+        with closing(sqlite3.connect(SnapshotStore.STORE_FILENAME)) as connection:
+            assert connection.execute("SELECT (SELECT COUNT(*) FROM nodes) + (SELECT COUNT(*) FROM snapshots)"
+                                      ).fetchone()[0] == 0
+
+    def test_compressed_json(self, tmp_path):
+        report = {'uuid': 'a'*32, 'friends': [{'uuid': 'b'*32, 'time': '2020-01-01'}]}
+        Files.write_data_as_json_to_file(report, "Additional friends of A", str(tmp_path), compress=True)
+        (path,) = tmp_path.iterdir()
+        assert path.name.endswith(Files.COMPRESSED_EXTENSION) and Files.read_json_textfile(str(path)) == report
+        (plain_path := tmp_path / "Player json.txt").write_text(json.dumps(report))
+        Files.compress_files([str(plain_path), str(path)])
+        assert sorted(p.name for p in tmp_path.iterdir())[1] == "Player json.txt.gz"
+        assert Files.read_json_textfile(str(tmp_path / "Player json.txt.gz")) == report
+
+    def test_single_flight(self, monkeypatch):
+        release, calls = threading.Event(), []
+        def fake_fetch(typeOfRequest: str, uuid_or_ign: str, *_) -> dict:
+            calls.append((typeOfRequest, uuid_or_ign))
+            assert release.wait(10)
+            if uuid_or_ign == 'b'*32:
+                raise hypixel.HypixelAPIError("Failed")
+            return {'uuid': uuid_or_ign}
+        monkeypatch.setattr(hypixel, '_fetchJSON', fake_fetch)
+        for uuid in ('a'*32, 'b'*32):
+            release.clear()
+            saved_before = hypixel.num_api_calls_saved
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(hypixel.getJSON, 'player', uuid, use_cache=False) for _ in range(4)]
+                while hypixel.num_api_calls_saved < saved_before + 3: # Until every other caller is waiting.
+                    time.sleep(0.001)
+                release.set()
+            if uuid == 'a'*32:
+                assert all(f.result() == {'uuid': uuid} for f in futures)
+            else:
+                assert all(isinstance(f.exception(), hypixel.HypixelAPIError) for f in futures)
+        assert calls == [('player', 'a'*32), ('player', 'b'*32)]
+
+    @pytest.mark.usefixtures('tmp_cwd')
+    def test_response_cache(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(ResponseCache.time, 'time', lambda: now[0])
+        monkeypatch.setattr(ResponseCache, 'MAX_ENTRIES', 3)
+        monkeypatch.setattr(ResponseCache, '_EVICTION_CHECK_INTERVAL', 1)
+        uuids = [f"{i:032x}" for i in range(4)]
+        for i, uuid in enumerate(uuids[:3]):
+            ResponseCache.put('player', uuid, bytes([i]))
+            now[0] += 1
+        assert ResponseCache.get('player', uuids[0]) == b'\0' # Now the least recently used is uuids[1].
+        ResponseCache.put('player', uuids[3], b'\3')
+        assert [ResponseCache.get('player', uuid) for uuid in uuids] == [b'\0', None, b'\2', b'\3']
+        monkeypatch.setattr(ResponseCache, 'MAX_ENTRIES', 10)
+        ResponseCache.put('status', uuids[0], b'online')
+        now[0] += ResponseCache.TTL_SECS['status']
+        assert ResponseCache.get('status', uuids[0]) == b'online'
+        now[0] += 1
+        assert ResponseCache.get('status', uuids[0]) is None and ResponseCache.get('player', uuids[0]) == b'\0'
+
+    def test_player_fingerprint(self, tmp_cwd, monkeypatch):
+        monkeypatch.setattr(MyClasses, '_args', Args(['main.py', 'a']))
+        bodies = {'1'*32: b'{"success": true, "player": {"displayname": "A", "stats": {"Pit": {}, "x": 1}}}',
+                  '2'*32: b'{"player":{"stats":{"x":1,"Pit":{}},"displayname":"A"},"success":true,"extra":0}',
+                  '3'*32: b'{"success": true, "player": {"displayname": "A", "stats": {"Pit": {}, "x": 2}}}',
+                  '4'*32: b'{"success": true, "player": {"displayname": "A", "lastLogin": 2, "lastLogout": 1}}'}
+        for uuid, body in bodies.items():
+            ResponseCache.put('player', uuid, body)
+        records = [hypixel.PlayerRecord.fetch(uuid) for uuid in bodies]
+        # Formatting, key order and fields outside the player object don't change the fingerprint:
+        assert records[0].fingerprint == records[1].fingerprint != records[2].fingerprint
+        assert records[0].fingerprint == hypixel.PlayerRecord(json.loads(bodies['1'*32])['player'], True).fingerprint
+        assert records[3].fingerprint is None and (tmp_cwd / ResponseCache.CACHE_FILENAME).is_file()
+
+    def test_ign_cache(self, tmp_cwd, monkeypatch):
+        ResponseCache.put_uuid_for_ign('Player', 'A'*32)
+        assert (tmp_cwd / ResponseCache.CACHE_FILENAME).is_file()
+        assert ResponseCache.get_uuid_for_ign('player') == 'a'*32 and ResponseCache.get_uuid_for_ign('other') is None
+        monkeypatch.setattr(ResponseCache, 'IGN_TTL_SECS', 0)
+        assert ResponseCache.get_uuid_for_ign('player') is None
+
+    def test_journaled_pairs(self, tmp_cwd, monkeypatch):
+        monkeypatch.setattr(Files, 'COMPACT_AFTER_ENTRIES', 4)
+        (tmp_cwd / Files.UUIDS_FILENAME).write_text("a 1\nb 2\n")
+        os.utime(Files.UUIDS_FILENAME, (0, 0))
+        Files.write_journaled_pairs(Files.UUIDS_FILENAME, {'a': '1', 'b': '2'}, {'a': '1', 'c': '3'})
+        assert Files.read_journaled_pairs(Files.UUIDS_FILENAME) == {'a': '1', 'c': '3'}
+        assert (tmp_cwd / Files.UUIDS_FILENAME).read_text() == "a 1\nb 2\n" # Not compacted yet.
+        Files.write_journaled_pairs(Files.UUIDS_FILENAME, {'a': '1', 'c': '3'}, {'a': '4', 'c': '3', 'd': '5'})
+        assert (tmp_cwd / Files.UUIDS_FILENAME).read_text() == "a 4\nc 3\nd 5\n"
+        assert not (tmp_cwd / (Files.UUIDS_FILENAME + Files.JOURNAL_SUFFIX)).exists()
+        Files.restore_journaled_pairs(Files.UUIDS_FILENAME, '1980-01-01')
+        assert Files.read_journaled_pairs(Files.UUIDS_FILENAME) == {'a': '1', 'b': '2'}
+
+    def test_restore_aliases_from_journal(self, tmp_cwd, monkeypatch):
+        inputs = iter(['x', 'Foo\tbar  baz', 'done'])
+        monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+        Files.update_aliases(keywords=())
+        os.remove(tmp_cwd / Files.ALIASES_FILENAME) # So the aliases can only come from the journal.
+        Files.restore_journaled_pairs(Files.ALIASES_FILENAME, '2100-01-01')
+        assert Files.get_aliases() == {'x': ['foo', 'bar', 'baz']}
+        assert Files.read_journaled_pairs(Files.ALIASES_FILENAME) == {'x': 'foo bar baz'}
+
+    def test_apply_aliases(self, tmp_cwd):
+        (tmp_cwd / Files.ALIASES_FILENAME).write_text('"a" = "b c"\n"b" = "d e"\n"e" = ""\n')
+        assert Files.apply_aliases(['A', 'x', 'e', 'Results/F.txt']) == ['d', 'c', 'x', 'Results/F.txt']
+        (tmp_cwd / Files.ALIASES_FILENAME).write_text('"a" = "b c"\n"b" = "d a"\n')
+        with pytest.raises(RuntimeError, match='a -> b -> a'):
+            Files.apply_aliases(['a'])
+
+    def test_friend_graph(self):
+        a, b, c, d, e, f = (f"{i:032x}" for i in range(0xf1, 0xf7))
+        a_id, b_id, c_id, d_id, e_id = (UuidTable.to_id(uuid) for uuid in (a, b, c, d, e))
+        graph = FriendGraph.from_friends_lists([(a_id, [b_id, c_id, a_id]), (b_id, [a_id, d_id]), (e_id, [])])
+        assert graph.num_edges() == 3 and graph.degree(a) == 2 and graph.degree(e) == graph.degree(f) == 0
+        assert sorted(graph.neighbours(b)) == sorted([a, d]) and graph.neighbours(f) == []
+        assert graph.shortest_path(c, d) == [c, a, b, d] and graph.distance(d, c) == 3 and graph.distance(a, a) == 0
+        assert graph.distance(a, e) is None and graph.distance(a, f) is None
+        assert [sorted(layer) for layer in graph.hop_layers(a, 1)] == [[a], sorted([b, c])]
+        assert [sorted(layer) for layer in graph.hop_layers(c, 5)] == [[c], [a], [b], [d]]
+
     def test_lintception(self):
         assert linters.run_linters() == linters.LintResult.SUCCESS
 